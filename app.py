@@ -17,6 +17,7 @@ def get_available_symbols():
         return []
     return sorted([p.name.split('=')[1] for p in data_dir.iterdir() if p.is_dir()])
 
+@st.cache_data
 def get_sp500_symbols():
     """Gets S&P 500 symbols from the csv file."""
     if not pathlib.Path("sp500_tickers.csv").exists():
@@ -109,7 +110,7 @@ def main():
         
         with st.spinner("Running backtest... (this may take up to 20 minutes for large universes)"):
             try:
-                result = run_backtest(config)
+                result = run_backtest(config) # Repeated configs are loaded from the runner's result cache
                 st.session_state["result"] = result
                 st.session_state["ran"] = True
                 st.session_state["last_config"] = config
@@ -142,7 +143,7 @@ def main():
         
         with tab2:
             rolling_window = st.slider("Rolling Window", 30, 252, 63)
-            st.plotly_chart(plots.plot_rolling_sharpe_vol(result.daily_snapshots, window=rolling_window), width='stretch')
+            st.plotly_chart(plots.plot_rolling_sharpe_vol(result.daily_snapshots, window=rolling_window, returns=result.returns), width='stretch')
 
         with tab3:
             st.subheader("Trade Blotter")
@@ -160,7 +161,7 @@ def main():
             st.plotly_chart(plots.plot_exposure_turnover(result.daily_snapshots), width='stretch')
 
         with tab5:
-            st.plotly_chart(plots.plot_benchmark_comparison(result.daily_snapshots, result.benchmark), width='stretch')
+            st.plotly_chart(plots.plot_benchmark_comparison(result.daily_snapshots, result.benchmark, cumulative_returns=result.cumulative_returns), width='stretch')
 
 
 if __name__ == "__main__":
@@ -10,3 +10,6 @@ class BacktestResult:
     fills: pd.DataFrame
     metrics: dict
     benchmark: pd.DataFrame = None
+    # Daily returns and equity rebased to 1, computed once by the report for the plots
+    returns: pd.Series = None
+    cumulative_returns: pd.Series = None
@@ -1,28 +1,178 @@
+import hashlib
+import json
 import os
+import shutil
+import time
+from dataclasses import dataclass
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.fs as pafs
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
-from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from pathlib import Path
 
+# jemalloc returns freed pages to the OS more readily during large ingests.
+# Not every pyarrow build ships it, in which case mimalloc is the next best.
+try:
+    pa.set_memory_pool(pa.jemalloc_memory_pool())
+except NotImplementedError:
+    try:
+        pa.set_memory_pool(pa.mimalloc_memory_pool())
+    except NotImplementedError:
+        pass
+
+# Size the on-disk Feather bar cache is pruned back to, least recently used files first
+IPC_CACHE_MAX_BYTES = 2 * 1024**3
+
+# Size the cache of Alpaca responses is pruned back to, oldest files first. Adjusted
+# history is restated after every later corporate action, so adjusted responses are
+# only reused while younger than API_CACHE_ADJUSTED_TTL; raw bars never change.
+API_CACHE_MAX_BYTES = 512 * 1024**2
+API_CACHE_ADJUSTED_TTL = pd.Timedelta(days=1)
+
+# Column layout of stored clean bars, and of every frame get_bars returns
+BAR_COLUMNS = ['date', 'symbol', 'open', 'high', 'low', 'close', 'adj_close', 'volume']
+
+# Hive layout of the raw store: one symbol=X directory per symbol
+SYMBOL_PARTITIONING = ds.partitioning(pa.schema([('symbol', pa.string())]), flavor='hive')
+
+# Hive layout of the clean store: symbol=X/year=YYYY. Files written before the
+# year level existed sit directly under symbol=X and read back with a null year.
+CLEAN_PARTITIONING = ds.partitioning(pa.schema([('symbol', pa.string()), ('year', pa.int16())]), flavor='hive')
+
+def _to_utc(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        return ts.tz_localize('UTC')
+    return ts.tz_convert('UTC')
+
+def _prune_oldest(paths, max_bytes: int):
+    """Deletes the files with the oldest modification times until the rest fit in `max_bytes`."""
+    entries = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError: # Pruned by another process
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+def _bar_matrices(bars: pd.DataFrame, fields: list[str], dtype=np.float64) -> tuple[pd.DatetimeIndex, pd.Index, dict[str, np.ndarray]]:
+    """
+    Scatters each of `fields` from long-format bars into a dense (date x symbol)
+    `dtype` matrix, with NaN where a symbol has no bar. Dates and symbols are
+    factorized once and shared by every field.
+    """
+    date_idx, dates = pd.factorize(bars['date'], sort=True)
+    symbol_idx, symbols = pd.factorize(bars['symbol'], sort=True)
+
+    matrices = {}
+    for field in fields:
+        values = np.full((len(dates), len(symbols)), np.nan, dtype=dtype)
+        values[date_idx, symbol_idx] = bars[field].to_numpy(dtype=dtype)
+        matrices[field] = values
+
+    return (
+        pd.DatetimeIndex(dates, name='date'),
+        pd.Index(np.asarray(symbols, dtype=object), name='symbol'),
+        matrices
+    )
+
+def _pivot_bars(bars: pd.DataFrame, field: str) -> pd.DataFrame:
+    """
+    Reshapes long-format bars into a (date x symbol) frame of `field`.
+    Equivalent to `bars.pivot(index='date', columns='symbol', values=field)`,
+    but scatters the values into a NumPy matrix by their sorted row/column
+    codes instead of building a MultiIndex and unstacking it.
+    """
+    dates, symbols, matrices = _bar_matrices(bars, [field])
+    return pd.DataFrame(matrices[field], index=dates, columns=symbols)
+
+@dataclass(frozen=True)
+class _PrimedWindow:
+    """
+    Bars loaded by `DataHandler.prime`, kept both long (`bars`, None when attached
+    from another process) and as dense per-field (date x symbol) matrices.
+    Published as one immutable object, so a reader on another thread sees either
+    the previous window or the new one, never matrices paired with another
+    window's dates or symbols.
+    """
+    symbols: frozenset[str]
+    start: pd.Timestamp
+    end: pd.Timestamp
+    mat: dict[str, np.ndarray]
+    dates: pd.DatetimeIndex
+    mat_symbols: pd.Index
+    date_ns: np.ndarray # dates as int64 nanoseconds, for searchsorted lookups
+    sym_idx: dict[str, int]
+    bars: pd.DataFrame | None = None
+
+    @classmethod
+    def from_matrices(cls, symbols, start, end, dates, mat_symbols, mat, bars=None) -> "_PrimedWindow":
+        return cls(
+            symbols=frozenset(symbols),
+            start=_to_utc(start),
+            end=_to_utc(end),
+            mat=mat,
+            dates=dates,
+            mat_symbols=mat_symbols,
+            date_ns=dates.as_unit('ns').asi8,
+            sym_idx={symbol: j for j, symbol in enumerate(mat_symbols)},
+            bars=bars
+        )
+
+    def covers(self, symbols: tuple[str], start: str, end: str) -> bool:
+        """Checks whether a request falls entirely inside the primed symbols and dates."""
+        return self.start <= _to_utc(start) and _to_utc(end) <= self.end and self.symbols.issuperset(symbols)
+
+    def date_rows(self, start: str, end: str) -> tuple[int, int]:
+        """Returns the [lo, hi) rows of the matrices falling within [start, end]."""
+        lo = np.searchsorted(self.date_ns, _to_utc(start).value)
+        hi = np.searchsorted(self.date_ns, _to_utc(end).value, side='right')
+        return int(lo), int(hi)
+
+    def cols(self, symbols: tuple[str]) -> np.ndarray:
+        """Returns the sorted matrix columns of the primed symbols among `symbols`."""
+        return np.sort([self.sym_idx[symbol] for symbol in set(symbols) if symbol in self.sym_idx]).astype(np.intp)
+
 class DataHandler:
     """
     Handles data ingestion, cleaning, and access for the backtesting framework.
     """
 
     def __init__(self, data_dir: str = 'data'):
-        self.alpaca_client = StockHistoricalDataClient(
-            api_key=os.getenv("ALPACA_API_KEY"),
-            secret_key=os.getenv("ALPACA_SECRET_KEY")
-        )
         self.data_dir = Path(data_dir)
         self.raw_dir = self.data_dir / 'raw'
         self.clean_dir = self.data_dir / 'clean' / 'bars'
+        self.api_cache_dir = self.data_dir / 'api_cache'
+        self.ipc_cache_dir = self.data_dir / 'ipc_cache'
+        self.manifest_path = self.clean_dir.parent / 'manifest.json'
         
         # Create directories if they don't exist
         self.raw_dir.mkdir(parents=True, exist_ok=True)
         self.clean_dir.mkdir(parents=True, exist_ok=True)
+        self.api_cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ipc_cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Clean dataset handle, opened on first use and dropped after each save
+        self._dataset: ds.Dataset | None = None
+
+        # Window loaded by prime(), served by get_bars/get_history/get_matrices/get_price.
+        # Readers take one reference to it; prime() replaces it whole.
+        self._primed: _PrimedWindow | None = None
 
         # Step 0: Canonical Bar Schema (as a reference)
         self.canonical_schema = {
@@ -34,6 +184,14 @@ class DataHandler:
             'adj_close': 'float64'
         }
 
+    @cached_property
+    def alpaca_client(self) -> StockHistoricalDataClient:
+        """Created on the first download, so serving local data needs no credentials."""
+        return StockHistoricalDataClient(
+            api_key=os.getenv("ALPACA_API_KEY"),
+            secret_key=os.getenv("ALPACA_SECRET_KEY")
+        )
+
     def run_ingestion(self, symbols: list[str], start: str, end: str):
         """
         Runs the entire data ingestion pipeline, but only for symbols that
@@ -42,31 +200,20 @@ class DataHandler:
         required_start = pd.to_datetime(start).tz_localize('UTC')
         required_end = pd.to_datetime(end).tz_localize('UTC')
 
-        symbols_to_ingest = []
-        for symbol in symbols:
-            try:
-                # Efficiently read only the date column for the specific symbol from the partitioned dataset
-                date_df = pd.read_parquet(
-                    self.clean_dir,
-                    engine='pyarrow',
-                    filters=[('symbol', '==', symbol)],
-                    columns=['date']
-                )
-
-                if date_df.empty:
-                    # No data for this symbol, so we need to ingest it.
-                    symbols_to_ingest.append(symbol)
-                    continue
-                
-                min_date = date_df['date'].min()
-                max_date = date_df['date'].max()
-
-                if required_start < min_date or required_end > max_date:
-                    symbols_to_ingest.append(symbol)
-            except Exception as e:
-                # This might happen if the directory is corrupted or on certain filesystem errors.
-                print(f"Could not read existing data for {symbol}, will re-ingest. Error: {e}")
-                symbols_to_ingest.append(symbol)
+        try:
+            coverage = self._coverage()
+
+            # Symbols with no local data or a date range that falls short need ingesting
+            symbols_to_ingest = [
+                symbol for symbol in symbols
+                if symbol not in coverage
+                or coverage[symbol][0] > required_start
+                or coverage[symbol][1] < required_end
+            ]
+        except Exception as e:
+            # This might happen if the directory is corrupted, empty or on certain filesystem errors.
+            print(f"Could not read existing data, will re-ingest all symbols. Error: {e}")
+            symbols_to_ingest = list(symbols)
         
         if not symbols_to_ingest:
             print("All required data is already present locally.")
@@ -78,10 +225,16 @@ class DataHandler:
         buffered_start = (pd.to_datetime(start) - pd.Timedelta(days=7)).strftime('%Y-%m-%d')
         buffered_end = (pd.to_datetime(end) + pd.Timedelta(days=7)).strftime('%Y-%m-%d')
         
-        raw_df = self._download_raw_data(symbols_to_ingest, buffered_start, buffered_end)
+        # The raw and adjusted requests are independent, so issue them concurrently.
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            raw_future = pool.submit(self._download_raw_data, symbols_to_ingest, buffered_start, buffered_end)
+            adjusted_future = pool.submit(self._fetch_bars, symbols_to_ingest, buffered_start, buffered_end, 'all')
+            raw_df = raw_future.result()
+            adj_df = adjusted_future.result()
         
         if raw_df.empty:
             print("No new raw data was downloaded.")
+            self._mark_covered(symbols_to_ingest, buffered_start, buffered_end)
             return
             
         print(f"Downloaded {len(raw_df)} raw bars.")
@@ -92,34 +245,62 @@ class DataHandler:
         self._validate_data(normalized_df)
         print("Validated data.")
 
-        adjusted_df = self._adjust_for_corporate_actions(normalized_df)
+        adjusted_df = self._adjust_for_corporate_actions(normalized_df, adj_df)
         print("Adjusted for corporate actions.")
 
         self._save_clean_data(adjusted_df)
+        self._mark_covered(symbols_to_ingest, buffered_start, buffered_end)
         print(f"Saved clean data to {self.clean_dir}")
         print("Data ingestion complete.")
 
-    def _download_raw_data(self, symbols: list[str], start: str, end: str) -> pd.DataFrame:
+    def _fetch_bars(self, symbols: list[str], start: str, end: str, adjustment: str) -> pd.DataFrame:
         """
-        Step 1: Download raw data from Alpaca.
+        Requests daily bars from Alpaca. Responses for ranges that have already
+        closed are kept on disk, so repeating an identical request skips the network;
+        adjusted responses expire after API_CACHE_ADJUSTED_TTL.
         """
+        key = hashlib.blake2b(repr((sorted(symbols), start, end, adjustment)).encode(), digest_size=8).hexdigest()
+        cache_path = self.api_cache_dir / f"{key}.parquet"
+        try:
+            age = time.time() - cache_path.stat().st_mtime
+        except FileNotFoundError:
+            pass
+        else:
+            if adjustment == 'raw' or age < API_CACHE_ADJUSTED_TTL.total_seconds():
+                return pd.read_parquet(cache_path)
+
         request_params = StockBarsRequest(
             symbol_or_symbols=symbols,
             timeframe=TimeFrame.Day,
             start=pd.to_datetime(start).tz_localize('UTC'),
             end=pd.to_datetime(end).tz_localize('UTC'),
-            adjustment='raw'
+            adjustment=adjustment
         )
         bars = self.alpaca_client.get_stock_bars(request_params)
-        df = bars.df
-        df.reset_index(inplace=True)
+        df = bars.df.reset_index()
+
+        if not df.empty and pd.to_datetime(end) < pd.Timestamp.now().normalize():
+            tmp_path = cache_path.with_suffix('.parquet.tmp')
+            df.to_parquet(tmp_path)
+            os.replace(tmp_path, cache_path)
+            _prune_oldest(self.api_cache_dir.glob('*.parquet'), API_CACHE_MAX_BYTES)
+        return df
+
+    def _download_raw_data(self, symbols: list[str], start: str, end: str) -> pd.DataFrame:
+        """
+        Step 1: Download raw data from Alpaca.
+        """
+        df = self._fetch_bars(symbols, start, end, 'raw')
         
-        # Store raw data
-        for symbol in symbols:
-            symbol_df = df[df['symbol'] == symbol]
-            if not symbol_df.empty:
-                output_path = self.raw_dir / f"{symbol}_{start}_to_{end}.parquet"
-                symbol_df.to_parquet(output_path)
+        # Store raw data in one partitioned write, one directory per symbol
+        if not df.empty:
+            ds.write_dataset(
+                pa.Table.from_pandas(df, preserve_index=False),
+                base_dir=self.raw_dir,
+                format='parquet',
+                partitioning=SYMBOL_PARTITIONING,
+                existing_data_behavior='delete_matching'
+            )
                 
         return df
 
@@ -141,114 +322,381 @@ class DataHandler:
     def _validate_data(self, df: pd.DataFrame):
         """
         Step 3: Perform basic quality checks.
+        Rows sorted by symbol, as produced by `_normalize_data`, are checked in
+        place; otherwise they are first grouped by a stable sort on symbol, which
+        keeps each symbol's dates in their original order. Each symbol's dates
+        must be strictly increasing.
         """
         if not pd.api.types.is_datetime64_any_dtype(df['date']):
              raise ValueError("Date column is not of datetime type.")
-        
-        for symbol, group in df.groupby('symbol'):
-            if not group['date'].is_monotonic_increasing:
-                raise ValueError(f"Dates for symbol {symbol} are not monotonic increasing.")
-            if (group['high'] < group[['open', 'close']].max(axis=1)).any():
-                raise ValueError(f"High is not the highest price for symbol {symbol}.")
-            if (group['low'] > group[['open', 'close']].min(axis=1)).any():
-                raise ValueError(f"Low is not the lowest price for symbol {symbol}.")
-            if (group['volume'] < 0).any():
-                raise ValueError(f"Volume is negative for symbol {symbol}.")
+
+        row_symbols = df['symbol'].to_numpy()
+        symbols = row_symbols
+        dates = df['date'].to_numpy(dtype='datetime64[ns]').view('i8')
+
+        # same[k]: rows k and k + 1 belong to the same symbol. Wherever the symbol
+        # changes it must increase, or some symbol's rows are not contiguous.
+        same = symbols[1:] == symbols[:-1]
+        if not (symbols[1:][~same] > symbols[:-1][~same]).all():
+            order = np.argsort(symbols, kind='stable')
+            symbols, dates = symbols[order], dates[order]
+            same = symbols[1:] == symbols[:-1]
+        # Duplicates were dropped by `_normalize_data`, so dates must strictly increase
+        bad = same & (np.diff(dates) <= 0)
+        if bad.any():
+            raise ValueError(f"Dates for symbol {symbols[np.argmax(bad) + 1]} are not monotonic increasing.")
+
+        # The OHLC and volume checks are per-row, so they run over the whole frame at once,
+        # in its original row order
+        open_, close = df['open'].to_numpy(), df['close'].to_numpy()
+        bad = df['high'].to_numpy() < np.fmax(open_, close)
+        if bad.any():
+            raise ValueError(f"High is not the highest price for symbol {row_symbols[np.argmax(bad)]}.")
+        bad = df['low'].to_numpy() > np.fmin(open_, close)
+        if bad.any():
+            raise ValueError(f"Low is not the lowest price for symbol {row_symbols[np.argmax(bad)]}.")
+        bad = df['volume'].to_numpy() < 0
+        if bad.any():
+            raise ValueError(f"Volume is negative for symbol {row_symbols[np.argmax(bad)]}.")
     
-    def _adjust_for_corporate_actions(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _adjust_for_corporate_actions(self, df: pd.DataFrame, adj_df: pd.DataFrame | None = None) -> pd.DataFrame:
         """
         Step 4: Handle corporate actions by getting adjusted data.
-        This function now performs a left merge to keep all raw data and fills
-        missing adjusted values with raw values to prevent data loss.
+        Adjusted bars are aligned onto the raw rows by (symbol, day) key, so all
+        raw data is kept and missing adjusted values fall back to raw values.
+        `adj_df` holds the adjustment='all' bars when the caller already fetched
+        them; otherwise they are requested here.
         """
         # df contains raw data, including unadjusted ohlc and volume
-        unadjusted_df = df[['date', 'symbol', 'open', 'high', 'low', 'close', 'volume']].copy()
+        final_df = df[['date', 'symbol', 'open', 'high', 'low', 'close', 'volume']].reset_index(drop=True)
 
-        symbols = df['symbol'].unique().tolist()
-        start = df['date'].min().strftime('%Y-%m-%d')
-        end = df['date'].max().strftime('%Y-%m-%d')
-
-        request_params = StockBarsRequest(
-            symbol_or_symbols=symbols,
-            timeframe=TimeFrame.Day,
-            start=pd.to_datetime(start).tz_localize('UTC'),
-            end=pd.to_datetime(end).tz_localize('UTC'),
-            adjustment='all' # gets fully adjusted data
-        )
-        adj_bars = self.alpaca_client.get_stock_bars(request_params)
-        adj_df = adj_bars.df.reset_index()
+        if adj_df is None:
+            symbols = df['symbol'].unique().tolist()
+            start = df['date'].min().strftime('%Y-%m-%d')
+            end = df['date'].max().strftime('%Y-%m-%d')
+            adj_df = self._fetch_bars(symbols, start, end, 'all')
         adj_df.rename(columns={
             'timestamp': 'date',
             # 'open', 'high', 'low' from this request are the adjusted values
             'close': 'adj_close' # This is adjusted close
         }, inplace=True)
         adj_df['date'] = pd.to_datetime(adj_df['date']).dt.tz_convert('UTC').dt.normalize()
-        
-        # We only need the adjusted ohl and adj_close from this
-        adj_df = adj_df[['date', 'symbol', 'open', 'high', 'low', 'adj_close']]
 
-        # Perform a left merge to keep all data from the raw source.
-        # Pandas automatically adds _x and _y suffixes to overlapping column names.
-        final_df = pd.merge(unadjusted_df, adj_df, on=['date', 'symbol'], how='left')
+        # Encode (symbol, day) as one integer key, with symbol codes shared by both sides
+        symbol_codes, _ = pd.factorize(pd.concat([final_df['symbol'], adj_df['symbol']], ignore_index=True))
+        def days(frame: pd.DataFrame) -> np.ndarray:
+            return frame['date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').view('i8')
+        raw_keys = symbol_codes[:len(final_df)] * 1_000_000 + days(final_df)
+        adj_keys = symbol_codes[len(final_df):] * 1_000_000 + days(adj_df)
+        order = np.argsort(adj_keys, kind='stable')
+        sorted_keys = adj_keys[order]
 
-        # Coalesce adjusted and unadjusted data. Prefer adjusted (_y) but fallback to raw (_x).
-        # The 'close' column from unadjusted_df remains the unadjusted close.
-        final_df['open'] = final_df['open_y'].fillna(final_df['open_x'])
-        final_df['high'] = final_df['high_y'].fillna(final_df['high_x'])
-        final_df['low'] = final_df['low_y'].fillna(final_df['low_x'])
+        # Locate each raw row's adjusted counterpart, if there is one
+        pos = np.minimum(np.searchsorted(sorted_keys, raw_keys), max(len(sorted_keys) - 1, 0))
+        found = sorted_keys[pos] == raw_keys if len(sorted_keys) else np.zeros(len(raw_keys), dtype=bool)
+        src = order[pos[found]]
 
-        # For adj_close, we fallback to the unadjusted 'close'
-        final_df['adj_close'] = final_df['adj_close'].fillna(final_df['close'])
-        
-        # Ensure final dataframe contains all original rows.
-        if len(final_df) != len(unadjusted_df):
-             raise ValueError("Data loss occurred unexpectedly during left merge.")
+        # Prefer adjusted values but fall back to raw where they are missing.
+        # For adj_close, we fall back to the unadjusted 'close', which is kept as is.
+        for column, fallback in [('open', 'open'), ('high', 'high'), ('low', 'low'), ('adj_close', 'close')]:
+            values = final_df[fallback].to_numpy(dtype=np.float64, copy=True)
+            adjusted = adj_df[column].to_numpy(dtype=np.float64)[src]
+            values[found] = np.where(np.isnan(adjusted), values[found], adjusted)
+            final_df[column] = values
 
-        # Reorder to match canonical schema, selecting the newly created coalesced columns.
-        final_df = final_df[['date', 'symbol', 'open', 'high', 'low', 'close', 'adj_close', 'volume']]
+        # Reorder to match canonical schema.
+        final_df = final_df[BAR_COLUMNS]
         
         return final_df
 
     def _save_clean_data(self, df: pd.DataFrame):
         """
-        Step 5: Store data in a layout optimized for backtests (partitioned by symbol).
-        We partition by symbol to avoid pyarrow's max partition limit when using a 
-        long date range.
+        Step 5: Store data in a layout optimized for backtests (partitioned by
+        symbol, then year). Date-range reads prune whole years by directory and
+        skip row groups inside a year by their date statistics.
         """
-        import pyarrow as pa
-        import pyarrow.parquet as pq
+        # Rows sorted by date within each symbol keep every row group's date
+        # statistics tight, so date-range reads can skip whole row groups.
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.sort_by([('symbol', 'ascending'), ('date', 'ascending')])
+        table = table.append_column('year', pc.cast(pc.year(table['date']), pa.int16()))
 
-        table = pa.Table.from_pandas(df)
-        
-        pq.write_to_dataset(
+        # A rewritten symbol replaces everything stored for it, including years
+        # the new data no longer covers and files from the symbol-only layout.
+        symbols = pc.unique(table['symbol']).to_pylist()
+        for symbol in symbols:
+            shutil.rmtree(self.clean_dir / f"symbol={symbol}", ignore_errors=True)
+
+        # write_dataset streams each partition's contiguous slice straight to
+        # its file, without a pandas groupby over the whole table. Its default
+        # cap of 1024 partitions is raised to the most (symbol, year) pairs possible.
+        years = pc.min_max(table['year'])
+        max_partitions = len(symbols) * (years['max'].as_py() - years['min'].as_py() + 1)
+        ds.write_dataset(
             table,
-            root_path=self.clean_dir,
-            partition_cols=['symbol'],
-            existing_data_behavior='delete_matching'
+            base_dir=self.clean_dir,
+            format='parquet',
+            partitioning=CLEAN_PARTITIONING,
+            existing_data_behavior='overwrite_or_ignore',
+            max_partitions=max(max_partitions, 1024),
+            max_rows_per_file=1_000_000,
+            max_rows_per_group=8192
         )
 
+        # Hand the ingest's buffers back to the OS before the next run
+        pa.default_memory_pool().release_unused()
+
+        # New partitions need rediscovering, and cached or primed results may be out of date
+        self._dataset = None
+        for path in self.ipc_cache_dir.glob('*.feather'):
+            path.unlink()
+        self._get_bars_cached.cache_clear()
+        self._primed = None
+
+        # Symbols rewritten here take the new data's range; a missing manifest
+        # is rebuilt from the whole dataset instead.
+        manifest = self._read_manifest()
+        if manifest is None:
+            self._coverage()
+        else:
+            self._write_manifest(df, manifest)
+
+    def _read_manifest(self) -> dict[str, list[str]] | None:
+        """Reads the {symbol: [first_date, last_date]} manifest, or None if it is missing or unreadable."""
+        try:
+            with self.manifest_path.open() as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, bars: pd.DataFrame, manifest: dict[str, list[str]]) -> dict[str, list[str]]:
+        """Merges the date range of each symbol in `bars` into `manifest` and writes it."""
+        ranges = bars.groupby('symbol', observed=True)['date'].agg(['min', 'max'])
+        for symbol, first, last in zip(ranges.index, ranges['min'], ranges['max']):
+            manifest[str(symbol)] = [first.isoformat(), last.isoformat()]
+        return self._dump_manifest(manifest)
+
+    def _mark_covered(self, symbols: list[str], start: str, end: str):
+        """
+        Widens the manifest range of each ingested symbol to the requested
+        [start, end], clipped to the last closed day. Symbols that listed after
+        `start`, or have no bars at all, then count as covered for that window
+        instead of being requested again on every run.
+        """
+        manifest = self._read_manifest()
+        if manifest is None:
+            self._coverage()
+            manifest = self._read_manifest() or {}
+
+        start_utc = _to_utc(start)
+        end_utc = min(_to_utc(end), pd.Timestamp.now(tz='UTC').normalize() - pd.Timedelta(days=1))
+        if end_utc < start_utc:
+            return
+        for symbol in symbols:
+            first, last = (pd.Timestamp(d) for d in manifest.get(symbol, (start_utc, end_utc)))
+            manifest[symbol] = [min(first, start_utc).isoformat(), max(last, end_utc).isoformat()]
+        self._dump_manifest(manifest)
+
+    def _dump_manifest(self, manifest: dict[str, list[str]]) -> dict[str, list[str]]:
+        """Writes the manifest atomically, so a crash never leaves a half-written file."""
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        with tmp_path.open('w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+        return manifest
+
+    def _coverage(self) -> dict[str, tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Returns the (first, last) date every symbol stored locally is covered
+        for: its bar dates, widened to any ingest window requested for it. Read
+        from the manifest when present; otherwise the dataset's symbol and date
+        columns are scanned once and the manifest is rebuilt from them.
+        """
+        manifest = self._read_manifest()
+        if manifest is None and next(self.clean_dir.rglob('*.parquet'), None) is None:
+            # Nothing stored yet, and an empty dataset has no columns to scan
+            manifest = self._dump_manifest({})
+        elif manifest is None:
+            probe = self._clean_dataset().to_table(columns=['symbol', 'date']).to_pandas()
+            manifest = self._write_manifest(probe, {})
+        return {symbol: (pd.Timestamp(first), pd.Timestamp(last)) for symbol, (first, last) in manifest.items()}
+
+    def _clean_dataset(self) -> ds.Dataset:
+        """
+        Returns the clean bars dataset. Partition discovery runs once and is
+        reused by every query until `_save_clean_data` writes new files.
+        """
+        if self._dataset is None:
+            self._dataset = ds.dataset(
+                self.clean_dir,
+                format='parquet',
+                partitioning=CLEAN_PARTITIONING,
+                filesystem=pafs.LocalFileSystem(use_mmap=True)
+            )
+        return self._dataset
+
     # Step 6 & 7: Data API with caching
     def get_bars(self, symbols: list[str] | str, start: str, end: str) -> pd.DataFrame:
         """
         Public method to load bar data. Converts list to tuple for caching.
+        The returned frame is shared with the cache without copying; pandas'
+        Copy-on-Write makes any modification by the caller copy lazily, so
+        the cached frame itself is never altered.
+        Requests inside the primed window are sliced from memory.
         """
-        if isinstance(symbols, list):
+        if isinstance(symbols, str):
+            symbols = (symbols,)
+        elif isinstance(symbols, list):
             symbols = tuple(symbols)
+
+        primed = self._primed
+        if primed is not None and primed.bars is not None and primed.covers(symbols, start, end):
+            bars = primed.bars
+            mask = (
+                bars['symbol'].isin(symbols)
+                & (bars['date'] >= _to_utc(start))
+                & (bars['date'] <= _to_utc(end))
+            ).to_numpy()
+            return bars[mask].reset_index(drop=True)
         return self._get_bars_cached(symbols, start, end)
 
-    def get_history(self, symbols: list[str] | str, end_date: str, lookback_days: int, field: str = 'adj_close') -> pd.DataFrame:
+    def get_history(self, symbols: list[str] | str, end_date: str, lookback_days: int, field: str = 'adj_close', dtype=np.float64) -> pd.DataFrame:
         """
         Public method to get historical data. Converts list to tuple for caching.
+        Requests inside the primed window are sliced from the field's matrix.
+        Prices are returned as `dtype`; pass np.float32 for signal computations
+        that do not need double precision.
         """
-        if isinstance(symbols, list):
+        if isinstance(symbols, str):
+            symbols = (symbols,)
+        elif isinstance(symbols, list):
             symbols = tuple(symbols)
-        return self._get_history_cached(symbols, end_date, lookback_days, field)
 
-    @lru_cache(maxsize=1024)
+        start_date = (pd.to_datetime(end_date) - pd.tseries.offsets.BDay(lookback_days)).strftime('%Y-%m-%d')
+        primed = self._primed
+        if primed is not None and field in primed.mat and primed.covers(symbols, start_date, end_date):
+            history = self._history_from_matrix(primed, symbols, start_date, end_date, field)
+        else:
+            history = self._history_from_bars(symbols, start_date, end_date, field)
+        return history if history.empty else history.astype(dtype)
+
+    def get_matrices(self, symbols: list[str], start: str, end: str, fields: list[str], dtype=np.float64) -> tuple[pd.DatetimeIndex, pd.Index, dict[str, np.ndarray]]:
+        """
+        Dense (date x symbol) matrices of `fields`, as `_bar_matrices` builds them
+        from `get_bars`. Requests inside the primed window are column-sliced out of
+        its matrices, so symbols primed alongside (e.g. a benchmark) cost nothing.
+        """
+        symbols = tuple(symbols)
+        primed = self._primed
+        if not (primed is not None and all(field in primed.mat for field in fields) and primed.covers(symbols, start, end)):
+            bars = self.get_bars(symbols, start, end)
+            if bars.empty:
+                return pd.DatetimeIndex([], tz='UTC', name='date'), pd.Index([], dtype=object, name='symbol'), {}
+            return _bar_matrices(bars, fields, dtype=dtype)
+
+        lo, hi = primed.date_rows(start, end)
+        cols = primed.cols(symbols)
+
+        # Like the bars, keep only dates and symbols with at least one bar
+        present = np.zeros((hi - lo, len(cols)), dtype=bool)
+        for values in primed.mat.values():
+            present |= ~np.isnan(values[lo:hi, cols])
+        rows = np.flatnonzero(present.any(axis=1))
+        cols = cols[present.any(axis=0)]
+        return (
+            primed.dates[lo:hi][rows],
+            primed.mat_symbols[cols],
+            {field: primed.mat[field][lo + rows[:, None], cols].astype(dtype) for field in fields}
+        )
+
+    def prime(self, symbols: list[str], start: str, end: str):
+        """
+        Loads every bar field for all symbols over [start, end] in one read and
+        keeps it in memory, both as bars and as dense (date x symbol) matrices.
+        `get_bars`, `get_history` and `get_price` then serve requests inside
+        that window without reading parquet. Already-primed windows are not reloaded.
+        """
+        primed = self._primed
+        if primed is not None and primed.covers(tuple(symbols), start, end):
+            return
+        bars = self.get_bars(symbols, start, end)
+        if bars.empty:
+            return
+        dates, mat_symbols, mat = _bar_matrices(bars, BAR_COLUMNS[2:])
+        self._primed = _PrimedWindow.from_matrices(symbols, start, end, dates, mat_symbols, mat, bars=bars)
+
+    def export_primed(self, path: Path) -> dict:
+        """
+        Writes the primed matrices to a memory-mappable .npy file at `path` and
+        returns what `attach_primed` needs to serve them in another process.
+        """
+        primed = self._primed
+        if primed is None:
+            raise ValueError("No primed window to export; call prime() first.")
+        fields = list(primed.mat)
+        shape = (len(fields), len(primed.dates), len(primed.mat_symbols))
+        stacked = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=shape)
+        for k, field in enumerate(fields):
+            stacked[k] = primed.mat[field]
+        stacked.flush()
+        return {
+            'path': str(path),
+            'fields': fields,
+            'dates': primed.dates,
+            'symbols': primed.mat_symbols,
+            'warm_symbols': primed.symbols,
+            'warm_range': (primed.start, primed.end),
+        }
+
+    def attach_primed(self, shared: dict):
+        """
+        Serves a window primed in another process from the file written by
+        `export_primed`. The matrices are memory-mapped read-only, so every
+        process attached to the file shares one copy. `get_bars` still reads
+        parquet, as the long-format bars are not shared.
+        """
+        stacked = np.load(shared['path'], mmap_mode='r')
+        self._primed = _PrimedWindow.from_matrices(
+            shared['warm_symbols'], *shared['warm_range'],
+            dates=shared['dates'],
+            mat_symbols=shared['symbols'],
+            mat={field: stacked[k] for k, field in enumerate(shared['fields'])}
+        )
+
+    @staticmethod
+    def _history_from_matrix(primed: _PrimedWindow, symbols: tuple[str], start: str, end: str, field: str) -> pd.DataFrame:
+        """
+        Slices `field` for [start, end] out of the primed matrix. Like pivoting
+        the bars, only dates and symbols with at least one value are kept.
+        """
+        lo, hi = primed.date_rows(start, end)
+        cols = primed.cols(symbols)
+
+        values = primed.mat[field][lo:hi, cols]
+        present = ~np.isnan(values)
+        rows, keep = present.any(axis=1), present.any(axis=0)
+        if not rows.any():
+            return pd.DataFrame()
+        return pd.DataFrame(
+            values[rows][:, keep],
+            index=primed.dates[lo:hi][rows],
+            columns=primed.mat_symbols[cols][keep]
+        )
+
     def get_price(self, symbol: str, date: str, field: str = 'adj_close') -> float | None:
         """
-        Gets a single price point for a symbol and date.
+        Gets a single price point for a symbol and date. Served from the
+        primed matrices when they cover the request, otherwise read from disk.
         """
+        primed = self._primed
+        if primed is not None and field in primed.mat:
+            ts = _to_utc(date).value
+            i = np.searchsorted(primed.date_ns, ts)
+            j = primed.sym_idx.get(symbol)
+            if i < len(primed.date_ns) and primed.date_ns[i] == ts and j is not None:
+                price = primed.mat[field][i, j]
+                return None if np.isnan(price) else float(price)
+
         bars = self.get_bars(symbol, date, date)
         if not bars.empty:
             return bars.iloc[0][field]
@@ -258,35 +706,70 @@ class DataHandler:
     def _get_bars_cached(self, symbols: tuple[str] | str, start: str, end:str) -> pd.DataFrame:
         """
         Cached implementation for loading bar data. Assumes symbols are hashable.
+        The lru_cache is the in-process level; results are also kept as
+        uncompressed Feather files under `ipc_cache_dir`, a second level that
+        survives restarts and is memory-mapped back instead of re-scanning parquet.
         """
         if isinstance(symbols, str):
             symbols = (symbols,) # Convert single string to tuple
-        
-        def to_utc(ts):
-            ts = pd.to_datetime(ts)
-            if ts.tzinfo is None:
-                return ts.tz_localize('UTC')
-            return ts.tz_convert('UTC')
-
-        filters = [
-            ('symbol', 'in', symbols),
-            ('date', '>=', to_utc(start)),
-            ('date', '<=', to_utc(end))
-        ]
-        
-        df = pd.read_parquet(self.clean_dir, engine='pyarrow', filters=filters)
-        return df.copy()
 
-    @lru_cache(maxsize=128)
-    def _get_history_cached(self, symbols: tuple[str] | str, end_date: str, lookback_days: int, field: str = 'adj_close') -> pd.DataFrame:
+        key = hashlib.blake2b(repr((sorted(symbols), start, end)).encode(), digest_size=8).hexdigest()
+        cache_path = self.ipc_cache_dir / f"{key}.feather"
+        try:
+            # Uncompressed and memory-mapped, numeric columns come back without being read or copied
+            cached = feather.read_table(cache_path, memory_map=True)
+        except FileNotFoundError:
+            pass
+        else:
+            os.utime(cache_path) # Marks it recently used for _prune_ipc_cache
+            return cached.to_pandas(split_blocks=True)
+
+        # Partition pruning handles the symbol and year predicates (legacy files
+        # without a year level always pass); the date predicate
+        # is checked against row-group statistics before any data is decoded.
+        start_utc, end_utc = _to_utc(start), _to_utc(end)
+        year = ds.field('year')
+        expr = (
+            ds.field('symbol').isin(list(symbols))
+            & (year.is_null() | ((year >= start_utc.year) & (year <= end_utc.year)))
+            & (ds.field('date') >= start_utc)
+            & (ds.field('date') <= end_utc)
+        )
+        table = self._clean_dataset().to_table(
+            columns=BAR_COLUMNS,
+            filter=expr,
+            use_threads=True
+        )
+
+        # Single-day point lookups would only litter the cache with tiny files.
+        # Written under a temporary name so other processes never see a partial file.
+        if start != end:
+            tmp_path = cache_path.with_suffix('.feather.tmp')
+            feather.write_feather(table, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, cache_path)
+            self._prune_ipc_cache()
+
+        # One block per column lets numeric columns wrap the Arrow buffers
+        # instead of being consolidated, and frees each buffer as it is converted.
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        return df
+
+    def _prune_ipc_cache(self):
         """
-        Cached implementation for getting historical data. Assumes symbols are hashable.
+        Deletes the least recently used Feather files until the cache fits in
+        IPC_CACHE_MAX_BYTES. Files already memory-mapped stay readable after deletion.
+        """
+        _prune_oldest(self.ipc_cache_dir.glob('*.feather'), IPC_CACHE_MAX_BYTES)
+
+    def _history_from_bars(self, symbols: tuple[str], start_date: str, end_date: str, field: str) -> pd.DataFrame:
+        """
+        Pivots `field` for [start_date, end_date] out of `get_bars`, whose own
+        cache makes repeated requests cheap.
         """
-        start_date = (pd.to_datetime(end_date) - pd.tseries.offsets.BDay(lookback_days)).strftime('%Y-%m-%d')
         bars = self.get_bars(symbols, start_date, end_date)
         
         if bars.empty:
             return pd.DataFrame()
         
-        history = bars.pivot(index='date', columns='symbol', values=field)
+        history = _pivot_bars(bars, field)
         return history
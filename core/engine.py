@@ -1,10 +1,13 @@
-from datetime import timedelta, datetime
+import logging
+import numpy as np
 import pandas as pd
 from core.data import DataHandler
-from core.execution import ExecutionHandler, Order
+from core.execution import ExecutionHandler, OrderBatch
 from core.portfolio import Portfolio
 from strategies.strategy import BaseStrategy
 
+log = logging.getLogger(__name__)
+
 class BacktestEngine:
     """
     Orchestrates the backtest by integrating data, strategy, execution, and portfolio components.
@@ -29,7 +32,12 @@ class BacktestEngine:
         
         self.all_data = self._preload_data()
         self.trading_days = self._get_trading_calendar()
-        self.scheduled_orders: dict[datetime, list] = {}
+        self._rb_mask = self._rebalance_mask()
+        # Order batches waiting to execute, indexed by trading-day position
+        self.scheduled_orders: list[list[OrderBatch]] = [[] for _ in self.trading_days]
+
+        # Symbol -> column position in the pre-loaded price frames
+        self._symbol_col = {symbol: j for j, symbol in enumerate(self.all_data['adj_close'].columns)} if self.all_data else {}
 
     def _preload_data(self):
         """
@@ -41,23 +49,23 @@ class BacktestEngine:
         
         all_symbols = self.strategy.universe
         
-        bars = self.data_handler.get_bars(
+        # Prices are held as float32 to halve the memory traffic of every sweep over them;
+        # the portfolio still accumulates equity in float64. Dates and symbols are shared by both fields.
+        dates, symbols, matrices = self.data_handler.get_matrices(
             symbols=all_symbols,
             start=start_date_with_lookback.strftime('%Y-%m-%d'),
-            end=self.end_date.strftime('%Y-%m-%d')
+            end=self.end_date.strftime('%Y-%m-%d'),
+            fields=['adj_close', 'open'],
+            dtype=np.float32
         )
         
-        if bars.empty:
+        if len(dates) == 0:
             print("Warning: No data loaded for the specified universe and date range.")
             return {}
 
-        # Pivot data for easier access
-        adj_close_prices = bars.pivot(index='date', columns='symbol', values='adj_close')
-        open_prices = bars.pivot(index='date', columns='symbol', values='open')
-        
         return {
-            'adj_close': adj_close_prices,
-            'open': open_prices
+            field: pd.DataFrame(values, index=dates, columns=symbols)
+            for field, values in matrices.items()
         }
 
     def _get_trading_calendar(self) -> pd.DatetimeIndex:
@@ -71,16 +79,28 @@ class BacktestEngine:
         trading_days = self.all_data['adj_close'].index
         return trading_days[(trading_days >= self.start_date) & (trading_days <= self.end_date)]
 
-    def _is_rebalance_day(self, current_date: datetime) -> bool:
-        """Checks if the current date is a rebalance day based on the schedule."""
-        # This is a simple implementation. A more robust one would use pandas offsets.
+    def _rebalance_mask(self) -> np.ndarray:
+        """Flags the trading days that are rebalance days under the schedule."""
+        days = self.trading_days
         if self.rebalance_schedule == 'D': # Daily
-            return True
+            return np.ones(len(days), dtype=bool)
         if self.rebalance_schedule == 'W': # End of Week
-            return current_date.weekday() == 4 # Friday
+            return np.asarray(days.weekday == 4) # Friday
         if self.rebalance_schedule == 'M': # End of Month
-            return (current_date + timedelta(days=1)).month != current_date.month
-        return False
+            return np.asarray((days + pd.Timedelta(days=1)).month != days.month)
+        return np.zeros(len(days), dtype=bool)
+
+    def _position_cols(self) -> np.ndarray:
+        """
+        Returns the columns of the pre-loaded price frames holding the
+        portfolio's current positions, aligned to `Portfolio.position_symbols`.
+        """
+        cols = np.empty(len(self.portfolio.position_symbols), dtype=np.intp)
+        for k, symbol in enumerate(self.portfolio.position_symbols):
+            if symbol not in self._symbol_col:
+                raise ValueError(f"Missing price for position '{symbol}' during mark-to-market.")
+            cols[k] = self._symbol_col[symbol]
+        return cols
 
     def run_backtest(self):
         """
@@ -94,61 +114,87 @@ class BacktestEngine:
         
         adj_close_prices = self.all_data['adj_close']
         open_prices = self.all_data['open']
+        self.portfolio.prealloc(len(self.trading_days))
+        self.strategy.columns = adj_close_prices.columns
+        self.strategy.reset()
+        pos_cols = self._position_cols()
+
+        # Close prices as a plain matrix, with each trading day's row looked up once.
+        # The trading days are a contiguous run of the price index, so this is
+        # just the loop position offset by the lookback rows before the start.
+        close_mat = adj_close_prices.to_numpy()
+        open_mat = open_prices.to_numpy()
+        # The strategy reads its history as row-slice views of a contiguous float32 matrix
+        window_mat = np.ascontiguousarray(close_mat)
+        day_rows = adj_close_prices.index.searchsorted(self.start_date) + np.arange(len(self.trading_days))
         
         for i, t_date in enumerate(self.trading_days):
-            print(f"Processing {t_date.date()}...")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Processing %s...", t_date.date())
             
             # --- 1. Start-of-day: Execute scheduled orders ---
-            orders_to_execute = self.scheduled_orders.pop(t_date, [])
-            if orders_to_execute:
-                open_prices_today = open_prices.loc[t_date] if t_date in open_prices.index else pd.Series()
-                fills, rejected = self.execution_handler.simulate_execution(
-                    orders=orders_to_execute,
-                    open_prices_for_day=open_prices_today
-                )
-                for fill in fills:
-                    self.portfolio.apply_fill(fill)
-                # TODO: Log rejected orders
-
-            # --- Get all symbols and close prices for end-of-day processes ---
-            close_prices_today = adj_close_prices.loc[t_date] if t_date in adj_close_prices.index else pd.Series()
+            batches_to_execute, self.scheduled_orders[i] = self.scheduled_orders[i], []
+            if batches_to_execute:
+                open_prices_today = open_mat[day_rows[i]]
+                for batch in batches_to_execute:
+                    fills, rejected = self.execution_handler.simulate_execution(
+                        orders=batch,
+                        open_prices_for_day=open_prices_today
+                    )
+                    for fill in fills:
+                        self.portfolio.apply_fill(fill)
+                    # TODO: Log rejected orders
+                # Positions only change through fills
+                pos_cols = self._position_cols()
+
+            # --- Get close prices for the held positions for end-of-day processes ---
+            # Positions do not change again today, so the vector is built once and reused.
+            prices_vec = close_mat[day_rows[i], pos_cols]
             
             # --- 2. End-of-day: Generate new orders on rebalance days ---
-            if self._is_rebalance_day(t_date):
-                current_equity = self.portfolio.mark_to_market(close_prices_today.to_dict())
+            if self._rb_mask[i]:
+                current_equity = self.portfolio.mark_to_market(prices_vec)
+
+                # Holdings and weights as vectors aligned to the strategy's columns
+                positions_vec = np.zeros(close_mat.shape[1])
+                positions_vec[pos_cols] = self.portfolio.position_shares
+                weights_vec = np.zeros(close_mat.shape[1])
+                if abs(current_equity) >= 1e-9:
+                    weights_vec[pos_cols] = self.portfolio.position_shares * prices_vec / current_equity
                 
                 portfolio_state = {
                     'equity': current_equity,
                     'cash': self.portfolio.cash,
-                    'positions': self.portfolio.positions,
-                    'weights': self.portfolio.get_weights(close_prices_today.to_dict())
+                    'positions_vec': positions_vec,
+                    'weights_vec': weights_vec
                 }
 
                 # Get historical data for the strategy
-                hist_data_end_idx = adj_close_prices.index.get_loc(t_date)
+                hist_data_end_idx = day_rows[i]
                 hist_data_start_idx = max(0, hist_data_end_idx - self.strategy.required_lookback)
-                hist_data = adj_close_prices.iloc[hist_data_start_idx:hist_data_end_idx+1]
+                hist_window = window_mat[hist_data_start_idx:hist_data_end_idx+1]
                 
-                if not hist_data.empty:
-                    target_quantities = self.strategy.generate_orders(t_date, hist_data, portfolio_state)
+                if len(hist_window):
+                    target_quantities = self.strategy.generate_orders(t_date, hist_window, portfolio_state, bar=hist_data_end_idx)
                     
                     # Create and schedule orders for the next trading day
-                    if i + 1 < len(self.trading_days):
+                    if i + 1 < len(self.trading_days) and target_quantities:
                         next_day = self.trading_days[i+1]
-                        new_orders = []
-                        for symbol, quantity in target_quantities.items():
-                            new_orders.append(
-                                Order(
-                                    symbol=symbol,
-                                    shares=quantity,
-                                    generated_dt=t_date,
-                                    execute_dt=next_day
-                                )
+                        batch = OrderBatch(
+                            symbols=np.fromiter(target_quantities.keys(), dtype=object, count=len(target_quantities)),
+                            shares=np.fromiter(target_quantities.values(), dtype=np.float64, count=len(target_quantities)),
+                            generated_dt=t_date,
+                            execute_dt=next_day,
+                            cols=np.fromiter(
+                                (self._symbol_col.get(symbol, -1) for symbol in target_quantities),
+                                dtype=np.intp,
+                                count=len(target_quantities)
                             )
-                        self.scheduled_orders.setdefault(next_day, []).extend(new_orders)
+                        )
+                        self.scheduled_orders[i + 1].append(batch)
 
             # --- 3. End-of-day: Snapshot portfolio ---
-            self.portfolio.take_snapshot(t_date, close_prices_today.to_dict())
+            self.portfolio.take_snapshot(t_date, prices_vec)
 
         print("Backtest complete.")
         return self.portfolio.history_df
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from datetime import datetime
+import numpy as np
 import pandas as pd
+from core.fast import compute_fills
 from core.portfolio import Fill
 
 
@@ -15,6 +17,42 @@ class Order:
     execute_dt: datetime
     style: str = "MKT" # Market order. Other options: LMT, STP, etc.
 
+@dataclass
+class OrderBatch:
+    """
+    A batch of market orders generated and executed together, stored as
+    parallel arrays instead of one Order object per trade.
+    """
+    symbols: np.ndarray  # object array of symbols
+    shares: np.ndarray  # float64, positive for buy, negative for sell
+    generated_dt: datetime
+    execute_dt: datetime
+    cols: np.ndarray | None = None  # Column of each symbol in a price row, -1 if absent
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @classmethod
+    def from_orders(cls, orders: list[Order]) -> "OrderBatch":
+        """Stacks orders that share an execution datetime into a batch."""
+        if any(order.execute_dt != orders[0].execute_dt for order in orders):
+            raise ValueError("Orders in a batch must share an execution datetime.")
+        return cls(
+            symbols=np.array([order.symbol for order in orders], dtype=object),
+            shares=np.fromiter((order.shares for order in orders), dtype=np.float64, count=len(orders)),
+            generated_dt=orders[0].generated_dt,
+            execute_dt=orders[0].execute_dt,
+        )
+
+    def order(self, i: int) -> Order:
+        """Returns the i-th order of the batch as an Order."""
+        return Order(
+            symbol=self.symbols[i],
+            shares=float(self.shares[i]),
+            generated_dt=self.generated_dt,
+            execute_dt=self.execute_dt,
+        )
+
 class BaseFillModel:
     """Abstract base class for fill models."""
     def get_fill_price(self, order: Order) -> float | None:
@@ -26,10 +64,23 @@ class NextOpenFillModel(BaseFillModel):
         pass
 
 class BaseCostModel:
-    """Abstract base class for cost models."""
-    def calculate_fee(self, shares: float, price: float) -> float:
+    """
+    Abstract base class for cost models. `calculate_fee` is called with
+    NumPy arrays of shares and prices for a whole batch of orders.
+    """
+    def calculate_fee(self, shares: np.ndarray, price: np.ndarray) -> np.ndarray:
         raise NotImplementedError
 
+    def calculate_fills(self, shares: np.ndarray, price: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Decides which orders fill (finite, positive price) and their fees.
+        Returns (fees, filled), with zero fees for orders that do not fill.
+        """
+        filled = np.isfinite(price) & (price > 0)
+        fees = np.zeros(len(shares))
+        fees[filled] = self.calculate_fee(shares[filled], price[filled])
+        return fees, filled
+
 class BasicCostModel(BaseCostModel):
     """
     A basic cost model with fixed basis points for commission and slippage.
@@ -38,12 +89,18 @@ class BasicCostModel(BaseCostModel):
         self.commission_bps = commission_bps / 10000.0  # Convert bps to decimal
         self.slippage_bps = slippage_bps / 10000.0
 
-    def calculate_fee(self, shares: float, price: float) -> float:
-        notional = abs(shares * price)
+    def calculate_fee(self, shares: np.ndarray, price: np.ndarray) -> np.ndarray:
+        notional = np.abs(shares * price)
         commission = self.commission_bps * notional
         slippage_cost = self.slippage_bps * notional
         return commission + slippage_cost
 
+    def calculate_fills(self, shares: np.ndarray, price: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # The kernel inlines this class's fee formula, so a subclass overriding calculate_fee goes through it instead
+        if type(self).calculate_fee is not BasicCostModel.calculate_fee:
+            return super().calculate_fills(shares, price)
+        return compute_fills(shares, price, self.commission_bps, self.slippage_bps)
+
 class ExecutionHandler:
     """
     Simulates the execution of orders, turning them into fills.
@@ -54,36 +111,51 @@ class ExecutionHandler:
 
     def simulate_execution(
         self,
-        orders: list[Order],
-        open_prices_for_day: pd.Series
+        orders: OrderBatch | list[Order],
+        open_prices_for_day: pd.Series | np.ndarray
     ) -> tuple[list[Fill], list[dict]]:
         """
-        Processes a list of orders for a given execution datetime.
+        Processes a batch of orders for a given execution datetime.
         Returns a list of fills and a log of rejected orders.
+        Prices and fees for the whole batch are computed as arrays.
+
+        `open_prices_for_day` is either a Series indexed by symbol, or a row of
+        a price matrix that the batch's `cols` index into.
         """
-        fills = []
-        rejected_log = []
-
-        for order in orders:
-            fill_price = open_prices_for_day.get(order.symbol)
-
-            if fill_price is None or fill_price <= 0:
-                rejected_log.append({
-                    'order': order,
-                    'reason': f"Missing or invalid price for {order.symbol} on {order.execute_dt.date()}"
-                })
-                continue
-
-            fee = self.cost_model.calculate_fee(order.shares, fill_price)
-            
-            fill = Fill(
-                dt=order.execute_dt,
-                symbol=order.symbol,
-                shares=order.shares,
-                price=fill_price,
+        if len(orders) == 0:
+            return [], []
+        batch = orders if isinstance(orders, OrderBatch) else OrderBatch.from_orders(orders)
+
+        if isinstance(open_prices_for_day, np.ndarray):
+            if batch.cols is None:
+                raise ValueError("Pricing from a matrix row requires the batch's column indices.")
+            prices = open_prices_for_day[batch.cols].astype(np.float64)
+            prices[batch.cols < 0] = np.nan
+        else:
+            prices = open_prices_for_day.reindex(batch.symbols).to_numpy(dtype=np.float64)
+        fees, filled = self.cost_model.calculate_fills(batch.shares, prices)
+
+        fills = [
+            Fill(
+                dt=batch.execute_dt,
+                symbol=symbol,
+                shares=shares,
+                price=price,
                 fee=fee,
             )
-            fills.append(fill)
+            for symbol, shares, price, fee in zip(
+                batch.symbols[filled].tolist(),
+                batch.shares[filled].tolist(),
+                prices[filled].tolist(),
+                fees[filled].tolist()
+            )
+        ]
+        rejected_log = [
+            {
+                'order': batch.order(i),
+                'reason': f"Missing or invalid price for {batch.symbols[i]} on {batch.execute_dt.date()}"
+            }
+            for i in np.flatnonzero(~filled)
+        ]
 
         return fills, rejected_log
-
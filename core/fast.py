@@ -0,0 +1,42 @@
+import numba
+import numpy as np
+
+
+@numba.njit(cache=True)
+def step(shares: np.ndarray, prices: np.ndarray, cash: float, last_eq: float) -> tuple[float, float, float, float]:
+    """
+    Per-bar accounting over aligned position arrays.
+
+    Returns:
+        (equity, positions_value, gross_exposure, daily_return)
+    """
+    pv = 0.0
+    gx = 0.0
+    for i in range(shares.shape[0]):
+        v = shares[i] * prices[i]
+        pv += v
+        gx += abs(v)
+    eq = cash + pv
+    ret = eq / last_eq - 1.0 if last_eq != 0 else 0.0
+    return eq, pv, gx, ret
+
+
+@numba.njit(cache=True)
+def compute_fills(shares: np.ndarray, prices: np.ndarray, commission: float, slippage: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fill kernel for a batch of market orders under a fixed-rate cost model.
+    An order fills when its price is finite and positive.
+
+    Returns:
+        (fees, filled) - fees are zero for orders that do not fill.
+    """
+    n = shares.shape[0]
+    fees = np.zeros(n)
+    filled = np.empty(n, dtype=np.bool_)
+    for i in range(n):
+        price = prices[i]
+        filled[i] = np.isfinite(price) and price > 0
+        if filled[i]:
+            notional = abs(shares[i] * price)
+            fees[i] = commission * notional + slippage * notional
+    return fees, filled
@@ -1,25 +1,28 @@
-from dataclasses import dataclass
 from datetime import datetime
+import numpy as np
 import pandas as pd
+from core.fast import step
+
+SNAPSHOT_FIELDS = ('equity', 'cash', 'positions_value', 'gross_exposure', 'net_exposure', 'num_positions', 'daily_return')
 
-@dataclass
 class Fill:
     """
     Represents an executed trade (a fill).
     """
-    dt: datetime
-    symbol: str
-    shares: float  # Positive for buy, negative for sell
-    price: float
-    fee: float = 0.0
+    __slots__ = ('dt', 'symbol', 'shares', 'price', 'fee', 'notional', 'cash_change')
 
-    @property
-    def notional(self) -> float:
-        return self.shares * self.price
+    def __init__(self, dt: datetime, symbol: str, shares: float, price: float, fee: float = 0.0):
+        self.dt = dt
+        self.symbol = symbol
+        self.shares = shares  # Positive for buy, negative for sell
+        self.price = price
+        self.fee = fee
+        self.notional = shares * price
+        self.cash_change = -self.notional - fee
 
-    @property
-    def cash_change(self) -> float:
-        return -self.notional - self.fee
+    def __repr__(self) -> str:
+        return (f"Fill(dt={self.dt!r}, symbol={self.symbol!r}, shares={self.shares!r}, "
+                f"price={self.price!r}, fee={self.fee!r})")
 
 class Portfolio:
     """
@@ -28,14 +31,56 @@ class Portfolio:
     def __init__(self, initial_cash: float = 100000.0):
         self.initial_cash = initial_cash
         self.cash = initial_cash
-        self.positions: dict[str, float] = {}
         self.fees_paid = 0.0
+
+        # Positions are stored as parallel arrays kept sorted by symbol
+        self._pos_symbols = np.empty(0, dtype=object)
+        self._pos_shares = np.empty(0, dtype=np.float64)
         
-        self.fills_log: list[Fill] = []
-        self.daily_history: list[dict] = []
+        # Fill log columns, grown by doubling as fills are applied
+        self._fill_dt = np.empty(1024, dtype='datetime64[ns]')
+        self._fill_cols = {
+            'symbol': np.empty(1024, dtype=object),
+            'shares': np.empty(1024, dtype=np.float64),
+            'price': np.empty(1024, dtype=np.float64),
+            'fee': np.empty(1024, dtype=np.float64),
+        }
+        self._fill_tz = None
+        self._fill_i = 0
+
+        self.prealloc(256)
         
         self._last_equity = initial_cash
 
+    def prealloc(self, n_bars: int):
+        """
+        Pre-allocates the daily snapshot buffers for `n_bars` bars, discarding
+        any recorded history. The buffers still grow if more bars are recorded.
+        """
+        self._snap_dt = np.empty(n_bars, dtype='datetime64[ns]')
+        self._snap_cols = {field: np.empty(n_bars, dtype=np.float64) for field in SNAPSHOT_FIELDS}
+        self._snap_cols['num_positions'] = np.empty(n_bars, dtype=np.int64)
+        self._snap_tz = None
+        self._snap_i = 0
+
+    @property
+    def positions(self) -> dict[str, float]:
+        """Returns the current holdings as a {symbol: shares} mapping."""
+        return dict(zip(self._pos_symbols.tolist(), self._pos_shares.tolist()))
+
+    @property
+    def position_symbols(self) -> np.ndarray:
+        """
+        Returns the held symbols in sorted order. Price vectors passed to
+        `mark_to_market`, `get_weights` and `take_snapshot` must be aligned to it.
+        """
+        return self._pos_symbols
+
+    @property
+    def position_shares(self) -> np.ndarray:
+        """Returns the shares held, aligned to `position_symbols`."""
+        return self._pos_shares
+
     def apply_fill(self, fill: Fill):
         """
         Updates the portfolio state based on a new fill.
@@ -47,81 +92,108 @@ class Portfolio:
             raise ValueError("Fee must be non-negative.")
 
         # --- Update position ---
-        self.positions[fill.symbol] = self.positions.get(fill.symbol, 0) + fill.shares
-        # Remove position if shares are zero (or very close to it)
-        if abs(self.positions[fill.symbol]) < 1e-9:
-            del self.positions[fill.symbol]
+        i = np.searchsorted(self._pos_symbols, fill.symbol)
+        if i < len(self._pos_symbols) and self._pos_symbols[i] == fill.symbol:
+            self._pos_shares[i] += fill.shares
+            # Remove position if shares are zero (or very close to it)
+            if abs(self._pos_shares[i]) < 1e-9:
+                self._pos_symbols = np.delete(self._pos_symbols, i)
+                self._pos_shares = np.delete(self._pos_shares, i)
+        elif abs(fill.shares) >= 1e-9:
+            self._pos_symbols = np.insert(self._pos_symbols, i, fill.symbol)
+            self._pos_shares = np.insert(self._pos_shares, i, fill.shares)
 
         # --- Update cash and fees ---
         self.cash += fill.cash_change
         self.fees_paid += fill.fee
 
-        self.fills_log.append(fill)
-
-    def mark_to_market(self, prices: dict[str, float]) -> float:
+        self._log_fill(fill)
+
+    def _log_fill(self, fill: Fill):
+        """Writes a fill into the next slot of the columnar fill log."""
+        i = self._fill_i
+        if i == len(self._fill_dt):
+            self._fill_dt = np.resize(self._fill_dt, 2 * i)
+            self._fill_cols = {field: np.resize(col, 2 * i) for field, col in self._fill_cols.items()}
+
+        ts = pd.Timestamp(fill.dt)
+        self._fill_tz = ts.tz
+        self._fill_dt[i] = ts.value
+        cols = self._fill_cols
+        cols['symbol'][i] = fill.symbol
+        cols['shares'][i] = fill.shares
+        cols['price'][i] = fill.price
+        cols['fee'][i] = fill.fee
+        self._fill_i = i + 1
+
+    def mark_to_market(self, prices_vec: np.ndarray) -> float:
         """
         Calculates and returns the current equity of the portfolio.
-        """
-        # --- Strict validation for missing prices ---
-        for symbol in self.positions:
-            if symbol not in prices:
-                raise ValueError(f"Missing price for position '{symbol}' during mark-to-market.")
 
-        positions_value = sum(self.positions[symbol] * prices[symbol] for symbol in self.positions)
-        
-        equity = self.cash + positions_value
-        
-        # --- Sanity check ---
-        if not abs(equity - (self.cash + positions_value)) < 1e-9:
-             raise RuntimeError("Portfolio invariant violated: equity != cash + positions_value")
+        Args:
+            prices_vec: Current prices aligned to `position_symbols`.
+        """
+        if prices_vec.shape != self._pos_shares.shape:
+            raise ValueError("Price vector is not aligned with the portfolio's positions.")
 
-        return equity
+        return self.cash + float(self._pos_shares @ prices_vec)
 
-    def get_weights(self, prices: dict[str, float]) -> dict[str, float]:
+    def get_weights(self, prices_vec: np.ndarray) -> dict[str, float]:
         """
         Calculates the weight of each asset in the portfolio.
         """
-        equity = self.mark_to_market(prices)
+        equity = self.mark_to_market(prices_vec)
         if abs(equity) < 1e-9:
-            return {symbol: 0.0 for symbol in self.positions}
+            return {symbol: 0.0 for symbol in self._pos_symbols.tolist()}
 
-        weights = {
-            symbol: (self.positions[symbol] * prices[symbol]) / equity
-            for symbol in self.positions
-        }
+        weights = dict(zip(self._pos_symbols.tolist(), (self._pos_shares * prices_vec / equity).tolist()))
         weights['cash'] = self.cash / equity
         return weights
 
-    def take_snapshot(self, dt: datetime, prices: dict[str, float]):
+    def take_snapshot(self, dt: datetime, prices_vec: np.ndarray):
         """
         Records a daily snapshot of the portfolio's state and performance.
         """
-        equity = self.mark_to_market(prices)
-        positions_value = equity - self.cash
-        
-        gross_exposure = sum(abs(self.positions[symbol] * prices[symbol]) for symbol in self.positions)
-        
-        snapshot = {
-            'datetime': dt,
-            'equity': equity,
-            'cash': self.cash,
-            'positions_value': positions_value,
-            'gross_exposure': gross_exposure,
-            'net_exposure': positions_value, # For long-only, net exposure = positions value
-            'num_positions': len(self.positions),
-            'daily_return': (equity / self._last_equity) - 1 if self._last_equity != 0 else 0.0,
-        }
-        self.daily_history.append(snapshot)
+        if prices_vec.shape != self._pos_shares.shape:
+            raise ValueError("Price vector is not aligned with the portfolio's positions.")
+
+        equity, positions_value, gross_exposure, daily_return = step(
+            self._pos_shares, np.ascontiguousarray(prices_vec, dtype=np.float64), self.cash, self._last_equity
+        )
+
+        i = self._snap_i
+        if i == len(self._snap_dt):
+            # Buffers are full: double them
+            capacity = max(2 * i, 1)
+            self._snap_dt = np.resize(self._snap_dt, capacity)
+            self._snap_cols = {field: np.resize(col, capacity) for field, col in self._snap_cols.items()}
+
+        ts = pd.Timestamp(dt)
+        self._snap_tz = ts.tz
+        self._snap_dt[i] = ts.value
+        cols = self._snap_cols
+        cols['equity'][i] = equity
+        cols['cash'][i] = self.cash
+        cols['positions_value'][i] = positions_value
+        cols['gross_exposure'][i] = gross_exposure
+        cols['net_exposure'][i] = positions_value # For long-only, net exposure = positions value
+        cols['num_positions'][i] = len(self._pos_symbols)
+        cols['daily_return'][i] = daily_return
+        self._snap_i = i + 1
         self._last_equity = equity
 
     @property
     def history_df(self) -> pd.DataFrame:
         """Returns the daily snapshot history as a pandas DataFrame."""
-        return pd.DataFrame(self.daily_history).set_index('datetime')
+        n = self._snap_i
+        index = pd.DatetimeIndex(self._snap_dt[:n], name='datetime').tz_localize(self._snap_tz)
+        return pd.DataFrame({field: col[:n] for field, col in self._snap_cols.items()}, index=index)
 
     @property
     def fills_df(self) -> pd.DataFrame:
         """Returns the fill log as a pandas DataFrame."""
-        if not self.fills_log:
+        n = self._fill_i
+        if n == 0:
             return pd.DataFrame()
-        return pd.DataFrame([f.__dict__ for f in self.fills_log]).set_index('dt')
+        index = pd.DatetimeIndex(self._fill_dt[:n], name='dt').tz_localize(self._fill_tz)
+        return pd.DataFrame({field: col[:n] for field, col in self._fill_cols.items()}, index=index)
@@ -1,3 +1,9 @@
+import hashlib
+import json
+from functools import lru_cache
+import os
+import pickle
+import threading
 import pandas as pd
 import pathlib
 
@@ -6,10 +12,103 @@ from core.portfolio import Portfolio
 from core.execution import ExecutionHandler, NextOpenFillModel, BasicCostModel
 from core.engine import BacktestEngine
 from strategies.registry import STRATEGY_REGISTRY
+from strategies.strategy import BaseStrategy
 from reporting.compute_report import BacktestReport
 from core.backtest_result import BacktestResult
 from dotenv import load_dotenv
 
+load_dotenv(dotenv_path='alpaca.env')
+
+# Set up on first use, once per process; repeated runs (e.g. from the UI) reuse the handler and its caches
+_data_handler: DataHandler | None = None
+_data_handler_lock = threading.Lock()
+
+_REPORT_DIR = pathlib.Path("reports") # Reports are temporary for the UI
+# Results of earlier runs, keyed by config, local data state and the code that computed them
+RESULT_CACHE_DIR = _REPORT_DIR / "_cache"
+# Results kept over the current data, least recently used dropped first
+RESULT_CACHE_MAX_ENTRIES = 256
+# Packages whose source decides a run's result
+_PACKAGE_ROOT = pathlib.Path(__file__).resolve().parent.parent
+_RESULT_CODE_DIRS = ('core', 'strategies', 'reporting')
+
+def get_data_handler() -> DataHandler:
+    """Returns the process-wide data handler, creating it on the first call."""
+    global _data_handler
+    with _data_handler_lock:
+        if _data_handler is None:
+            _data_handler = DataHandler(data_dir='data')
+        return _data_handler
+
+@lru_cache(maxsize=None)
+def _parse_dates(start: str, end: str) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """Parses a config's date strings; repeated sweeps over one window parse them once."""
+    return pd.to_datetime(start), pd.to_datetime(end)
+
+@lru_cache(maxsize=None)
+def _code_key() -> bytes:
+    """Content hash of the backtesting source, read once per process."""
+    h = hashlib.blake2b(digest_size=8)
+    for path in sorted(p for name in _RESULT_CODE_DIRS for p in (_PACKAGE_ROOT / name).rglob('*.py')):
+        h.update(path.relative_to(_PACKAGE_ROOT).as_posix().encode())
+        h.update(path.read_bytes())
+    return h.digest()
+
+def _data_key() -> str:
+    """
+    Content hash of the data manifest, which changes whenever ingestion writes new
+    bars, salted with the backtesting source so results from older code are not reused.
+    """
+    manifest_path = get_data_handler().manifest_path
+    h = hashlib.blake2b(_code_key(), digest_size=8)
+    h.update(manifest_path.read_bytes() if manifest_path.exists() else b'')
+    return h.hexdigest()
+
+def _result_key(config: dict, data_key: str | None = None) -> str:
+    """Content key of a run's inputs: the data manifest's hash (`data_key`, by default the current one), then the config's."""
+    config_key = hashlib.blake2b(json.dumps(config, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+    return f"{data_key or _data_key()}-{config_key}"
+
+def _prune_result_cache(data_key: str):
+    """
+    Deletes cached results computed over data or code other than `data_key`'s, which can
+    never be hit again, then the least recently used beyond RESULT_CACHE_MAX_ENTRIES.
+    """
+    current = []
+    for path in RESULT_CACHE_DIR.glob('*.pkl'):
+        if path.name.startswith(f"{data_key}-"):
+            try:
+                current.append((path.stat().st_mtime, path))
+            except FileNotFoundError: # Pruned by another run
+                pass
+        else:
+            path.unlink(missing_ok=True)
+    current.sort()
+    for _, path in current[:max(len(current) - RESULT_CACHE_MAX_ENTRIES, 0)]:
+        path.unlink(missing_ok=True)
+
+def _build_strategy(config: dict) -> BaseStrategy:
+    """Instantiates the config's strategy with the parameters it declares."""
+    strategy_info = STRATEGY_REGISTRY[config['strategy']]
+    strategy_params = {k: config[k] for k in config.keys() & strategy_info['_param_keys']}
+    return strategy_info['class'](universe=config['universe'], **strategy_params)
+
+def _benchmark_lookback_days(config: dict) -> int:
+    """Calendar span of the backtest plus a year for rolling metrics."""
+    start_date, end_date = _parse_dates(config['start_date'], config['end_date'])
+    return (end_date - start_date).days + 252
+
+def _data_start(config: dict, required_lookback: int) -> str:
+    """
+    First date a run needs: the earlier of the engine's lookback-padded start
+    and the start of the report's benchmark window.
+    """
+    start_date, end_date = _parse_dates(config['start_date'], config['end_date'])
+    return min(
+        start_date - pd.tseries.offsets.BDay(required_lookback + 5),
+        end_date - pd.tseries.offsets.BDay(_benchmark_lookback_days(config))
+    ).strftime('%Y-%m-%d')
+
 def run_backtest(config: dict) -> BacktestResult:
     """
     Runs a backtest with the given configuration.
@@ -20,25 +119,39 @@ def run_backtest(config: dict) -> BacktestResult:
     Returns:
         A BacktestResult object containing the results.
     """
-    load_dotenv(dotenv_path='alpaca.env')
-    
     # --- Component Setup ---
-    data_handler = DataHandler(data_dir='data')
-    
+    data_handler = get_data_handler()
     print("Ensuring data is available for backtest universe and benchmark...")
     symbols_to_ingest = config['universe'] + [config.get('benchmark', 'SPY')]
     data_handler.run_ingestion(symbols=list(set(symbols_to_ingest)), start="2019-01-01", end=config['end_date'])
 
+    # An identical run over the same data is loaded instead of re-run
+    data_key = _data_key()
+    cache_path = RESULT_CACHE_DIR / f"{_result_key(config, data_key)}.pkl"
+    try:
+        with cache_path.open('rb') as f:
+            result = pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError):
+        # Truncated, or pickled from classes that have since changed; recomputed below
+        cache_path.unlink(missing_ok=True)
+    else:
+        print("Loading cached result for this configuration...")
+        os.utime(cache_path) # Marks it recently used for _prune_result_cache
+        return result
+
     portfolio = Portfolio(initial_cash=config['initial_cash'])
     
     fill_model = NextOpenFillModel()
     cost_model = BasicCostModel(commission_bps=1.0, slippage_bps=5.0)
     execution_handler = ExecutionHandler(fill_model, cost_model)
 
-    strategy_info = STRATEGY_REGISTRY[config['strategy']]
-    strategy_class = strategy_info['class']
-    strategy_params = {k: v for k, v in config.items() if k in strategy_info['params']}
-    strategy = strategy_class(universe=config['universe'], **strategy_params)
+    strategy = _build_strategy(config)
+
+    # Load the universe and benchmark once, over every date the engine and the report
+    # will ask for; both are then served from the in-memory matrices instead of parquet.
+    data_handler.prime(list(set(symbols_to_ingest)), start=_data_start(config, strategy.required_lookback), end=config['end_date'])
 
     engine = BacktestEngine(
         start_date=config['start_date'],
@@ -56,30 +169,35 @@ def run_backtest(config: dict) -> BacktestResult:
     # --- Analysis / Reporting ---
     print("\n--- Generating Report ---")
 
-    report_dir = pathlib.Path("reports") # Reports are temporary for the UI
-    
     # Fetch benchmark data
     benchmark_symbol = config.get('benchmark', 'SPY')
     print(f"Fetching benchmark data ({benchmark_symbol})...")
-    # Calculate lookback days needed
-    start_date = pd.to_datetime(config['start_date'])
-    end_date = pd.to_datetime(config['end_date'])
-    lookback_days = (end_date - start_date).days + 252 # Add a year for rolling metrics
     
-    benchmark_data = data_handler.get_history(symbols=[benchmark_symbol], end_date=config['end_date'], lookback_days=lookback_days, field="adj_close")
+    benchmark_data = data_handler.get_history(symbols=[benchmark_symbol], end_date=config['end_date'], lookback_days=_benchmark_lookback_days(config), field="adj_close")
 
     report = BacktestReport(
         daily_snapshots=daily_snapshots,
         fills=portfolio.fills_df,
         benchmark=benchmark_data,
-        report_dir=report_dir
+        report_dir=_REPORT_DIR
     )
     
     metrics = report.metrics
     
-    return BacktestResult(
+    result = BacktestResult(
         daily_snapshots=daily_snapshots,
         fills=portfolio.fills_df,
         metrics=metrics,
-        benchmark=benchmark_data
+        benchmark=benchmark_data,
+        returns=report.returns,
+        cumulative_returns=report.cumulative_returns
     )
+
+    # Written under a temporary name so a concurrent run never reads a partial file
+    RESULT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix('.pkl.tmp')
+    with tmp_path.open('wb') as f:
+        pickle.dump(result, f)
+    os.replace(tmp_path, cache_path)
+    _prune_result_cache(data_key)
+    return result
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 def target_weights_to_quantities(
@@ -8,9 +9,11 @@ def target_weights_to_quantities(
 ) -> dict[str, float]:
     """
     Converts a dictionary of target weights into a dictionary of target quantities.
+    Targets are sparse: only symbols in `target_weights` are sized, so a held
+    symbol that is omitted keeps its position and one mapped to 0.0 is liquidated.
 
     Args:
-        target_weights: A dictionary mapping symbols to their target weights.
+        target_weights: A dictionary mapping symbols to their new target weights.
         current_positions: A dictionary of current holdings (symbol -> shares).
         equity: The current total equity of the portfolio.
         close_prices: A Series of the most recent close prices.
@@ -18,26 +21,32 @@ def target_weights_to_quantities(
     Returns:
         A dictionary of {symbol: quantity} for orders to be placed.
     """
-    quantities = {}
-    
-    all_symbols = set(target_weights.keys()) | set(current_positions.keys())
+    # --- Align targets, holdings and prices over the targeted symbols ---
+    if not target_weights:
+        return {}
+    symbols = np.array(list(target_weights), dtype=object)
+    target_w = np.fromiter(target_weights.values(), dtype=np.float64, count=len(symbols))
+    current_shares = np.array([current_positions.get(symbol, 0.0) for symbol in symbols.tolist()], dtype=np.float64)
+    prices = close_prices.reindex(symbols).to_numpy(dtype=np.float64, na_value=np.nan)
 
-    for symbol in all_symbols:
-        target_w = target_weights.get(symbol, 0.0)
-        current_shares = current_positions.get(symbol, 0.0)
-        
-        price = close_prices.get(symbol)
-        if price is None or pd.isna(price) or price <= 0:
-            continue
+    return aligned_weights_to_quantities(symbols, target_w, current_shares, equity, prices)
 
-        target_shares = (target_w * equity) / price
-        order_qty = target_shares - current_shares
-        
-        # Simple rounding and dust filter
-        order_qty = round(order_qty)
-        if abs(order_qty) < 1:
-            continue
-            
-        quantities[symbol] = order_qty
-        
-    return quantities
+def aligned_weights_to_quantities(
+    symbols: np.ndarray,
+    target_w: np.ndarray,
+    current_shares: np.ndarray,
+    equity: float,
+    prices: np.ndarray
+) -> dict[str, float]:
+    """
+    Array form of `target_weights_to_quantities`: target weights, current
+    shares and close prices are given as arrays aligned to `symbols`.
+    """
+    # --- Size orders, skipping symbols without a valid price ---
+    valid = np.isfinite(prices) & (prices > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        order_qty = np.round(target_w * equity / prices - current_shares)
+
+    # Dust filter
+    keep = valid & (np.abs(order_qty) >= 1)
+    return dict(zip(symbols[keep].tolist(), order_qty[keep].tolist()))
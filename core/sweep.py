@@ -0,0 +1,54 @@
+import itertools
+from joblib import Parallel, delayed
+
+import core.runner as runner
+from core.backtest_result import BacktestResult
+from strategies.registry import STRATEGY_REGISTRY
+
+# Path of the shared price file this process is attached to
+_attached_path: str | None = None
+
+def _run_attached(config: dict, shared: dict) -> BacktestResult:
+    """Worker entry point: serves prices from the shared file, then runs one backtest."""
+    global _attached_path
+    if _attached_path != shared['path']:
+        runner.get_data_handler().attach_primed(shared)
+        _attached_path = shared['path']
+    return runner.run_backtest(config)
+
+def run_sweep(base_config: dict, grid: dict[str, list], n_jobs: int = -1) -> list[tuple[dict, BacktestResult]]:
+    """
+    Runs a backtest for every combination of the parameter values in `grid`,
+    applied on top of `base_config`, in parallel worker processes.
+
+    The universe and benchmark are ingested and loaded once here, then written
+    to a memory-mapped file that every worker maps read-only instead of loading
+    its own copy.
+
+    Returns:
+        A list of (config, result) pairs in grid order.
+    """
+    configs = [base_config | dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    unknown = set(grid) - STRATEGY_REGISTRY[base_config['strategy']]['_param_keys']
+    if unknown:
+        raise ValueError(f"Unknown parameters for strategy '{base_config['strategy']}': {sorted(unknown)}")
+
+    # --- Load the data every run needs, once ---
+    data_handler = runner.get_data_handler()
+    symbols = list(set(base_config['universe'] + [base_config.get('benchmark', 'SPY')]))
+    data_handler.run_ingestion(symbols=symbols, start="2019-01-01", end=base_config['end_date'])
+
+    # Wide enough for the longest lookback in the grid and the report's benchmark window
+    start = min(runner._data_start(config, runner._build_strategy(config).required_lookback) for config in configs)
+    data_handler.prime(symbols, start=start, end=base_config['end_date'])
+
+    # --- Share it and fan out ---
+    shared_path = data_handler.ipc_cache_dir / f"sweep_{runner._result_key(base_config)}.npy"
+    shared = data_handler.export_primed(shared_path)
+    try:
+        results = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(_run_attached)(config, shared) for config in configs
+        )
+    finally:
+        shared_path.unlink(missing_ok=True)
+    return list(zip(configs, results))
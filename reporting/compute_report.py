@@ -1,22 +1,18 @@
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import pathlib
+from functools import cached_property
+import plotly.graph_objects as go
 
 from tabulate import tabulate
+import reporting.plots as plots
 
 class BacktestReport:
     def __init__(self, daily_snapshots: pd.DataFrame, fills: pd.DataFrame, benchmark: pd.DataFrame = None, report_dir: pathlib.Path = None):
         self.daily_snapshots = daily_snapshots
         self.fills = fills
         self.benchmark = benchmark
-        self.returns = self._calculate_returns()
-        self.metrics = self._calculate_metrics()
         
         if report_dir:
             self.report_dir = report_dir
@@ -24,27 +20,41 @@ class BacktestReport:
             self.report_dir = reports_dir
         self.report_dir.mkdir(exist_ok=True)
 
-    def _calculate_returns(self):
-        return self.daily_snapshots['equity'].pct_change().fillna(0)
+    @cached_property
+    def returns(self) -> pd.Series:
+        equity = self.daily_snapshots['equity'].to_numpy(dtype=np.float64)
+        returns = np.zeros_like(equity)
+        np.divide(equity[1:], equity[:-1], out=returns[1:])
+        returns[1:] -= 1.0
+        # A day without an equity mark counts as flat, as with pct_change().fillna(0)
+        returns[~np.isfinite(returns)] = 0.0
+        return pd.Series(returns, index=self.daily_snapshots.index)
 
-    def _calculate_metrics(self):
-        total_return = (self.daily_snapshots['equity'].iloc[-1] / self.daily_snapshots['equity'].iloc[0]) - 1
+    @cached_property
+    def cumulative_returns(self) -> pd.Series:
+        """Equity rebased to 1 at the first day, shared by the plots."""
+        equity = self.daily_snapshots['equity'].to_numpy(dtype=np.float64)
+        return pd.Series(equity / equity[0], index=self.daily_snapshots.index)
+
+    @cached_property
+    def metrics(self) -> dict[str, str]:
+        equity = self.daily_snapshots['equity'].to_numpy(dtype=np.float64)
+        r = self.returns.to_numpy()
+
+        total_return = (equity[-1] / equity[0]) - 1
         
         days = (self.daily_snapshots.index[-1] - self.daily_snapshots.index[0]).days
         cagr = (1 + total_return) ** (365.25 / days) - 1 if days > 0 else 0
 
-        annualized_volatility = self.returns.std() * np.sqrt(252)
+        annualized_volatility = np.std(r, ddof=1) * np.sqrt(252) if len(r) > 1 else np.nan
         
         sharpe_ratio = (cagr / annualized_volatility) if annualized_volatility != 0 else 0
 
-        downside_returns = self.returns[self.returns < 0]
-        downside_volatility = downside_returns.std() * np.sqrt(252)
+        downside_returns = r[r < 0]
+        downside_volatility = np.std(downside_returns, ddof=1) * np.sqrt(252) if len(downside_returns) > 1 else np.nan
         sortino_ratio = (cagr / downside_volatility) if downside_volatility != 0 else 0
 
-        cumulative_returns = (1 + self.returns).cumprod()
-        peak = cumulative_returns.expanding(min_periods=1).max()
-        drawdown = (cumulative_returns / peak) - 1
-        max_drawdown = drawdown.min()
+        max_drawdown = self._drawdown.min()
         
         calmar_ratio = (cagr / abs(max_drawdown)) if max_drawdown != 0 else 0
 
@@ -59,6 +69,15 @@ class BacktestReport:
         }
         return metrics
 
+    @cached_property
+    def _drawdown(self) -> pd.Series:
+        """
+        Drawdown from the running equity peak, shared by metrics and plot_drawdown.
+        The peak skips days without an equity mark (fmax), which are NaN here only.
+        """
+        equity = self.daily_snapshots['equity'].to_numpy(dtype=np.float64)
+        return pd.Series(equity / np.fmax.accumulate(equity) - 1, index=self.daily_snapshots.index)
+
     def display_summary(self):
         summary_text = tabulate(self.metrics.items(), headers=["Metric", "Value"], tablefmt="grid")
         print("\n--- Backtest Summary ---")
@@ -68,6 +87,18 @@ class BacktestReport:
         with summary_path.open("w") as f:
             f.write(summary_text)
 
+    def plot_equity(self) -> go.Figure:
+        return plots.plot_equity_curve(self.daily_snapshots, self.benchmark)
+
+    def plot_drawdown(self) -> go.Figure:
+        return plots.plot_drawdown_curve(self.daily_snapshots, drawdown=self._drawdown)
+
+    def plot_rolling_sharpe_vol(self, window: int = 252) -> go.Figure:
+        return plots.plot_rolling_sharpe_vol(self.daily_snapshots, window=window, returns=self.returns)
+
+    def plot_benchmark_comparison(self) -> go.Figure:
+        return plots.plot_benchmark_comparison(self.daily_snapshots, self.benchmark, cumulative_returns=self.cumulative_returns)
+
     def get_summary_df(self):
         return pd.DataFrame.from_dict(self.metrics, orient='index', columns=['Value'])
 
@@ -1,32 +1,119 @@
+import hashlib
+from functools import lru_cache, wraps
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+# Series longer than this are downsampled before being sent to the browser
+MAX_POINTS = 10_000
+
+def _content_key(args: tuple, kwargs: dict) -> str:
+    """Hashes call arguments by value; frames and series by their index, labels and data."""
+    h = hashlib.blake2b(digest_size=16)
+    for name, value in [(None, arg) for arg in args] + sorted(kwargs.items()):
+        h.update(repr(name).encode())
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            h.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+            labels = value.columns if isinstance(value, pd.DataFrame) else [value.name]
+            h.update(repr(list(labels)).encode())
+        else:
+            h.update(repr(value).encode())
+    return h.hexdigest()
+
+class _ByContent:
+    """Call arguments that hash and compare by their content, so lru_cache can key on them."""
+    __slots__ = ('args', 'kwargs', 'key')
+
+    def __init__(self, args: tuple, kwargs: dict):
+        self.args = args
+        self.kwargs = kwargs
+        self.key = _content_key(args, kwargs)
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __eq__(self, other) -> bool:
+        return self.key == other.key
+
+def _memoize_by_content(func):
+    """
+    Caches a plot function's figures by the content of its arguments, so redrawing
+    an unchanged result (e.g. on a UI rerun) reuses the figure. Returned figures are
+    shared and should not be modified.
+    """
+    cached = lru_cache(maxsize=32)(lambda call: func(*call.args, **call.kwargs))
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return cached(_ByContent(args, kwargs))
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+def _lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling over evenly spaced points.
+    Returns the indices of the `n_out` points that best preserve the shape of `y`.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=np.float64)
+    # The first and last points are always kept; the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        next_hi = edges[b + 2] if b + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        # Pick the point forming the largest triangle with the previous pick and the next bucket's average
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[b + 1] = a
+    return keep
+
+def _downsample(series: pd.Series) -> pd.Series:
+    """Reduces a series to at most MAX_POINTS points for plotting."""
+    if len(series) <= MAX_POINTS:
+        return series
+    return series.iloc[_lttb_indices(series.to_numpy(dtype=np.float64), MAX_POINTS)]
+
 def plot_equity_curve(daily_snapshots: pd.DataFrame, benchmark: pd.DataFrame = None):
     """Generates an equity curve plot using Plotly."""
     fig = go.Figure()
 
     # Add portfolio equity
-    fig.add_trace(go.Scatter(
-        x=daily_snapshots.index,
-        y=daily_snapshots['equity'],
+    equity = _downsample(daily_snapshots['equity'])
+    fig.add_trace(go.Scattergl(
+        x=equity.index,
+        y=equity,
         mode='lines',
         name='Portfolio',
         line=dict(color='blue')
     ))
 
-    # Add benchmark if available and not empty
+    # Add benchmark if available and not empty, rebased to the portfolio's starting equity
+    # from the first benchmark date on or after the portfolio's first day
     if benchmark is not None and not benchmark.empty:
-        benchmark_series = benchmark.iloc[:, 0]
-        start_equity = daily_snapshots['equity'].iloc[0]
-        rebased_benchmark = (benchmark_series / benchmark_series.iloc[0]) * start_equity
-        fig.add_trace(go.Scatter(
-            x=rebased_benchmark.index,
-            y=rebased_benchmark,
-            mode='lines',
-            name='Benchmark',
-            line=dict(color='grey', dash='dash')
-        ))
+        first = np.searchsorted(benchmark.index.as_unit('ns').asi8, daily_snapshots.index[0].value)
+        benchmark_values = benchmark.iloc[first:, 0].to_numpy(dtype=np.float64)
+        if len(benchmark_values):
+            start_equity = daily_snapshots['equity'].to_numpy(dtype=np.float64)[0]
+            rebased_benchmark = _downsample(pd.Series(
+                benchmark_values / benchmark_values[0] * start_equity,
+                index=benchmark.index[first:]
+            ))
+            fig.add_trace(go.Scattergl(
+                x=rebased_benchmark.index,
+                y=rebased_benchmark,
+                mode='lines',
+                name='Benchmark',
+                line=dict(color='grey', dash='dash')
+            ))
 
     fig.update_layout(
         title='Equity Curve',
@@ -36,16 +123,20 @@ def plot_equity_curve(daily_snapshots: pd.DataFrame, benchmark: pd.DataFrame = N
     )
     return fig
 
-def plot_drawdown_curve(daily_snapshots: pd.DataFrame):
-    """Generates a drawdown curve plot using Plotly."""
-    returns = daily_snapshots['equity'].pct_change().fillna(0)
-    cumulative_returns = (1 + returns).cumprod()
-    peak = cumulative_returns.expanding(min_periods=1).max()
-    drawdown = (cumulative_returns / peak) - 1
+@_memoize_by_content
+def plot_drawdown_curve(daily_snapshots: pd.DataFrame, drawdown: pd.Series = None):
+    """
+    Generates a drawdown curve plot using Plotly. A precomputed `drawdown`
+    series (e.g. from BacktestReport) is used as-is when given.
+    """
+    if drawdown is None:
+        equity = daily_snapshots['equity'].to_numpy(dtype=np.float64)
+        drawdown = pd.Series(equity / np.fmax.accumulate(equity) - 1, index=daily_snapshots.index)
+    drawdown = _downsample(drawdown)
 
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=drawdown.index,
         y=drawdown,
         mode='lines',
@@ -61,12 +152,41 @@ def plot_drawdown_curve(daily_snapshots: pd.DataFrame):
     )
     return fig
 
-def plot_rolling_sharpe_vol(daily_snapshots: pd.DataFrame, window: int = 252):
-    """Generates rolling Sharpe and Volatility plots."""
-    returns = daily_snapshots['equity'].pct_change().fillna(0)
-    
-    rolling_vol = returns.rolling(window=window).std() * (252**0.5)
-    rolling_sharpe = returns.rolling(window=window).mean() * 252 / rolling_vol
+@_memoize_by_content
+def plot_rolling_sharpe_vol(daily_snapshots: pd.DataFrame, window: int = 252, returns: pd.Series = None):
+    """
+    Generates rolling Sharpe and Volatility plots. Precomputed daily `returns`
+    (e.g. from BacktestReport) are used as-is when given.
+    """
+    if returns is None:
+        returns = daily_snapshots['equity'].pct_change().fillna(0)
+
+    # Full windows only, from running sums in O(N). As with rolling(window), the first
+    # window - 1 points and any window holding a missing return stay NaN.
+    rolling_vol = pd.Series(np.nan, index=returns.index)
+    rolling_sharpe = pd.Series(np.nan, index=returns.index)
+    values = returns.to_numpy(dtype=np.float64)
+    valid = np.isfinite(values)
+    if 0 < window <= len(returns) and valid.any():
+        # Centred on the mean so the sum of squares does not cancel catastrophically;
+        # missing returns add nothing to the sums and are caught by the valid count
+        offset = values[valid].mean()
+        centred = np.where(valid, values - offset, 0.0)
+        cum = np.concatenate(([0.0], np.cumsum(centred)))
+        cum_sq = np.concatenate(([0.0], np.cumsum(centred * centred)))
+        cum_valid = np.concatenate(([0], np.cumsum(valid)))
+        sums = cum[window:] - cum[:-window]
+        sq_sums = cum_sq[window:] - cum_sq[:-window]
+        full = (cum_valid[window:] - cum_valid[:-window]) == window
+        # Windows of one repeated value (e.g. before the first trade) are exactly flat, as with rolling()
+        n_changes = np.concatenate(([0], np.cumsum(values[1:] != values[:-1])))
+        flat = n_changes[window - 1:] == n_changes[:len(values) - window + 1]
+        mean = np.where(flat, values[window - 1:], sums / window + offset)
+        sq_dev = np.where(flat, 0.0, np.maximum(sq_sums - sums * sums / window, 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vol = np.where(full, np.sqrt(sq_dev / (window - 1)) * (252**0.5), np.nan)
+            rolling_vol.iloc[window - 1:] = vol
+            rolling_sharpe.iloc[window - 1:] = mean * 252 / vol
 
     fig = make_subplots(rows=2, cols=1, shared_xaxes=True, subplot_titles=('Rolling Volatility', 'Rolling Sharpe Ratio'))
 
@@ -90,32 +210,39 @@ def plot_exposure_turnover(daily_snapshots: pd.DataFrame):
     fig.update_layout(title_text="Exposure and Turnover")
     return fig
 
-def plot_benchmark_comparison(daily_snapshots: pd.DataFrame, benchmark: pd.DataFrame):
-    """Generates benchmark comparison plots."""
+def plot_benchmark_comparison(daily_snapshots: pd.DataFrame, benchmark: pd.DataFrame, cumulative_returns: pd.Series = None):
+    """
+    Generates benchmark comparison plots. Precomputed `cumulative_returns`
+    (equity rebased to 1, e.g. from BacktestReport) are used as-is when given.
+    """
     
     if benchmark is None or benchmark.empty:
         fig = go.Figure()
         fig.update_layout(title_text="Benchmark Comparison (Benchmark data not available)")
         return fig
 
-    returns = daily_snapshots['equity'].pct_change().fillna(0)
-    benchmark_returns = benchmark.iloc[:,0].pct_change().fillna(0)
-
-    # Rebased equity
-    strat_equity_rebased = (1 + returns).cumprod()
-    bench_equity_rebased = (1 + benchmark_returns).cumprod()
-
-    # Excess return
-    excess_return = returns - benchmark_returns
-    excess_return_curve = (1 + excess_return).cumprod()
-
+    # Both curves rebased to 1 at the strategy's first day, on the strategy's dates
+    x = daily_snapshots.index
+    if cumulative_returns is None:
+        equity = daily_snapshots['equity'].to_numpy(dtype=np.float64)
+        strat_equity_rebased = equity / equity[0]
+    else:
+        strat_equity_rebased = cumulative_returns.to_numpy(dtype=np.float64)
+    # Benchmark as of each strategy date: its last value on or before that date
+    asof = np.searchsorted(benchmark.index.as_unit('ns').asi8, x.as_unit('ns').asi8, side='right') - 1
+    bench = np.where(asof >= 0, benchmark.iloc[:, 0].to_numpy(dtype=np.float64)[asof], np.nan)
+    valid = np.flatnonzero(~np.isnan(bench))
+    bench_equity_rebased = bench / bench[valid[0]] if len(valid) else bench
+
+    # Excess return as the strategy's growth relative to the benchmark's
+    excess_return_curve = strat_equity_rebased / bench_equity_rebased
 
     fig = make_subplots(rows=2, cols=1, shared_xaxes=True, subplot_titles=('Rebased Equity Curves', 'Excess Return vs Benchmark'))
 
-    fig.add_trace(go.Scatter(x=strat_equity_rebased.index, y=strat_equity_rebased, name='Strategy'), row=1, col=1)
-    fig.add_trace(go.Scatter(x=bench_equity_rebased.index, y=bench_equity_rebased, name='Benchmark'), row=1, col=1)
+    fig.add_trace(go.Scattergl(x=x, y=strat_equity_rebased, name='Strategy'), row=1, col=1)
+    fig.add_trace(go.Scattergl(x=x, y=bench_equity_rebased, name='Benchmark'), row=1, col=1)
     
-    fig.add_trace(go.Scatter(x=excess_return_curve.index, y=excess_return_curve, name='Excess Return'), row=2, col=1)
+    fig.add_trace(go.Scattergl(x=x, y=excess_return_curve, name='Excess Return'), row=2, col=1)
 
     fig.update_layout(title_text="Benchmark Comparison")
     return fig
@@ -0,0 +1,65 @@
+import numba
+import numpy as np
+
+# fastmath without the no-NaN/no-inf assumptions: missing bars must still propagate as NaN
+_FASTMATH = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+
+@numba.njit(cache=True, fastmath=_FASTMATH, error_model='numpy')
+def push_returns(returns: np.ndarray, ring: np.ndarray, pos: int, sums: np.ndarray,
+                 sq_sums: np.ndarray, missing: np.ndarray, vol: np.ndarray) -> int:
+    """
+    Pushes one row of returns into a rolling window, evicting the oldest row.
+
+    `ring` holds the window's returns (one row per bar) and `sums`, `sq_sums`
+    and `missing` its per-column sum, sum of squares and count of non-finite
+    returns. `vol` receives the window's sample std (NaN while any return in
+    the window is missing). Returns the ring position of the next push.
+    """
+    w = ring.shape[0]
+    for j in range(ring.shape[1]):
+        old = ring[pos, j]
+        if np.isfinite(old):
+            sums[j] -= old
+            sq_sums[j] -= old * old
+        else:
+            missing[j] -= 1
+        new = returns[j]
+        if np.isfinite(new):
+            sums[j] += new
+            sq_sums[j] += new * new
+        else:
+            missing[j] += 1
+        ring[pos, j] = new
+
+        if missing[j] > 0:
+            vol[j] = np.nan
+        else:
+            vol[j] = np.sqrt(max(sq_sums[j] - sums[j] * sums[j] / w, 0.0) / (w - 1))
+    return (pos + 1) % w
+
+
+@numba.njit(parallel=True, cache=True, fastmath=_FASTMATH, error_model='numpy')
+def signal_kernel(window: np.ndarray, lookback_short: int, vol: np.ndarray, entry_z: float,
+                  exit_z: float, entry_w: float, current_w: np.ndarray, out: np.ndarray):
+    """
+    Mean reversion target weights for every column of a price window, given
+    each column's return volatility.
+
+    A column enters at `entry_w` when its z-score is below `entry_z`, exits
+    when it is above `exit_z`, and otherwise keeps `current_w`. Volatility
+    below 1e-6 zeroes the weight. `window` must hold at least `lookback_short`
+    rows; it is not bounds checked.
+    """
+    n_rows = window.shape[0]
+    for j in numba.prange(window.shape[1]):
+        z = (window[n_rows - 1, j] / window[n_rows - lookback_short, j] - 1.0) / vol[j]
+
+        w = current_w[j]
+        if z > exit_z and w > 0:
+            w = 0.0
+        if z < entry_z:
+            w = entry_w
+        if vol[j] < 1e-6:
+            w = 0.0
+        out[j] = w
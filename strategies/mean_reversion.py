@@ -1,9 +1,9 @@
 from datetime import datetime
-import pandas as pd
 import numpy as np
 
 from strategies.strategy import BaseStrategy
-from core.sizer import target_weights_to_quantities
+from strategies._kernels import push_returns, signal_kernel
+from core.sizer import aligned_weights_to_quantities
 
 class MeanReversionStrategy(BaseStrategy):
     """
@@ -11,7 +11,14 @@ class MeanReversionStrategy(BaseStrategy):
     
     Generates a buy signal when a security's recent return drops below a
     Z-score threshold relative to its recent volatility.
+
+    Volatility is kept as a rolling sum and sum of squares of daily returns that
+    is updated in O(1) per symbol when the engine's `bar` shows consecutive calls
+    advancing the history window by one row, and re-seeded from the window otherwise.
     """
+    # Re-seed the rolling sums after this many incremental updates to bound float drift
+    _RESEED_EVERY = 252
+
     def __init__(
         self,
         universe: list[str],
@@ -20,68 +27,99 @@ class MeanReversionStrategy(BaseStrategy):
         entry_z: float = 1.5,
         exit_z: float = 0.5
     ):
+        # The kernel indexes the window without bounds checks, so bad lookbacks must fail here
+        if lookback_short < 1:
+            raise ValueError(f"lookback_short must be at least 1, got {lookback_short}.")
+        if lookback_vol < 2:
+            raise ValueError(f"lookback_vol must be at least 2, got {lookback_vol}.")
+
         self.universe = universe
         self.lookback_short = lookback_short
         self.lookback_vol = lookback_vol
         self.entry_z = -abs(entry_z)  # Ensure it's negative
         self.exit_z = -abs(exit_z)    # Ensure it's negative
 
-        self.required_lookback = self.lookback_vol + 1
+        # Enough bars for both the volatility returns and the short-horizon return
+        self.required_lookback = max(self.lookback_vol, self.lookback_short) + 1
+
+        # Compile (or load from cache) the kernels before the backtest loop
+        window = np.ones((self.required_lookback, 1), dtype=np.float32)
+        self._seed_rolling_vol(window)
+        signal_kernel(window, self.lookback_short, self._vol, self.entry_z, self.exit_z, 0.0, np.zeros(1), np.empty(1))
+        self.reset()
+
+    def reset(self):
+        """Discards the rolling volatility state, e.g. before a new backtest."""
+        self._last_bar = None
+
+    def _seed_rolling_vol(self, window: np.ndarray):
+        """Rebuilds the rolling return window from the last `lookback_vol` returns in `window`."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = window[-self.lookback_vol:] / window[-self.lookback_vol - 1:-1] - 1
+
+        n = window.shape[1]
+        self._ring = np.zeros((self.lookback_vol, n))
+        self._sums = np.zeros(n)
+        self._sq_sums = np.zeros(n)
+        self._missing = np.zeros(n, dtype=np.int64)
+        self._vol = np.empty(n)
+        self._ring_pos = 0
+        for row in returns:
+            self._ring_pos = push_returns(row, self._ring, self._ring_pos, self._sums, self._sq_sums, self._missing, self._vol)
+        self._roll_pushes = 0
+
+    def _rolling_vol(self, window: np.ndarray, bar: int | None) -> np.ndarray:
+        """Returns the volatility of each column of `window` over its last `lookback_vol` returns."""
+        # The sums roll forward only if the window moved on by exactly one row since the last call
+        advanced = (
+            bar is not None
+            and self._last_bar is not None
+            and bar == self._last_bar + 1
+            and self._roll_pushes < self._RESEED_EVERY
+            and window.shape[1] == self._ring.shape[1]
+        )
+        self._last_bar = bar
+        if not advanced:
+            self._seed_rolling_vol(window)
+            return self._vol
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = window[-1] / window[-2] - 1
+        self._ring_pos = push_returns(returns, self._ring, self._ring_pos, self._sums, self._sq_sums, self._missing, self._vol)
+        self._roll_pushes += 1
+        return self._vol
 
     def generate_orders(
         self, 
         dt: datetime, 
-        data: pd.DataFrame, 
-        portfolio_state: dict
+        window: np.ndarray, 
+        portfolio_state: dict,
+        bar: int | None = None
     ) -> dict[str, float]:
         """
         Generates a dictionary of target quantities based on the mean reversion signal.
+        The signal is computed for every column of `window` at once.
         """
-        target_weights = {}
-        
-        for symbol in self.universe:
-            if symbol not in data.columns:
-                target_weights[symbol] = 0.0
-                continue
+        current_weight = portfolio_state['weights_vec']
+        weights = np.zeros(window.shape[1])
 
-            hist = data[symbol]
-            
-            # --- Guardrails ---
-            if len(hist) < self.required_lookback:
-                target_weights[symbol] = 0.0
-                continue # Not enough data
+        # --- Guardrails ---
+        if len(window) >= self.required_lookback:
+            # --- Signal Calculation and Position Sizing ---
+            signal_kernel(
+                window, self.lookback_short, self._rolling_vol(window, bar), self.entry_z, self.exit_z,
+                1.0 / len(self.universe), current_weight, weights
+            )
 
-            # --- Signal Calculation ---
-            daily_returns = hist.pct_change(fill_method=None)
-            daily_returns.iloc[0] = 0.0
-            volatility = daily_returns.rolling(window=self.lookback_vol).std().iloc[-1]
-            
-            if volatility < 1e-6: # Volatility floor
-                target_weights[symbol] = 0.0
-                continue
-
-            short_horizon_return = (hist.iloc[-1] / hist.iloc[-self.lookback_short]) - 1
-            z_score = short_horizon_return / volatility
-
-            # --- Position Sizing ---
-            current_weight = portfolio_state['weights'].get(symbol, 0.0)
-            
-            if z_score < self.entry_z:
-                # Signal to buy/hold
-                target_weights[symbol] = 1.0 / len(self.universe) # Equal weight
-            elif z_score > self.exit_z and current_weight > 0:
-                # Signal to exit
-                target_weights[symbol] = 0.0
-            else:
-                # Maintain current position (no new signal)
-                target_weights[symbol] = current_weight
-        
         # --- Sizing ---
-        quantities = target_weights_to_quantities(
-            target_weights=target_weights,
-            current_positions=portfolio_state['positions'],
+        # Only symbols whose target moved off their current weight are sized; the rest hold
+        changed = np.flatnonzero(weights != current_weight)
+        quantities = aligned_weights_to_quantities(
+            symbols=np.asarray(self.columns, dtype=object)[changed],
+            target_w=weights[changed],
+            current_shares=portfolio_state['positions_vec'][changed],
             equity=portfolio_state['equity'],
-            close_prices=data.iloc[-1] # Last row of history is current close
+            prices=window[-1, changed] # Last row of history is current close
         )
         
         return quantities
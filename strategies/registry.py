@@ -40,3 +40,7 @@ STRATEGY_REGISTRY = {
         }
     }
 }
+
+# Parameter names per strategy, for binding a config's values without walking the schema
+for _info in STRATEGY_REGISTRY.values():
+    _info['_param_keys'] = frozenset(_info['params'])
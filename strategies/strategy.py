@@ -1,26 +1,45 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
 class BaseStrategy(ABC):
     """
     Abstract base class for a trading strategy.
+
+    The engine reads `required_lookback` to size the history window it passes to
+    `generate_orders`, and sets `columns` to the symbols labelling that window's columns.
     """
+    required_lookback: int = 1
+    columns: pd.Index | None = None
+
+    def reset(self):
+        """
+        Clears any state carried between `generate_orders` calls. Called by the
+        engine at the start of each backtest.
+        """
+
     @abstractmethod
     def generate_orders(
         self, 
         dt: datetime, 
-        data: pd.DataFrame, 
-        portfolio_state: dict
+        window: np.ndarray, 
+        portfolio_state: dict,
+        bar: int | None = None
     ) -> list:
         """
         Generates a list of orders based on market data and portfolio state.
         
         Args:
             dt: The current datetime of the backtest.
-            data: A dictionary or DataFrame of market data for signal generation.
-            portfolio_state: A dictionary containing the current state of the portfolio 
-                             (e.g., equity, cash, positions).
+            window: A float32 (bars x symbols) array of close prices ending at `dt`,
+                    with columns labelled by `columns`.
+            portfolio_state: A dictionary containing the current state of the portfolio:
+                             'equity' and 'cash', and the 'positions_vec' (shares) and
+                             'weights_vec' arrays aligned to `columns`.
+            bar: The row of `window`'s last bar in the engine's price matrix, so a call
+                 with `bar` one past the previous call's has a window advanced by one
+                 row. None when the caller does not track rows.
 
         Returns:
             A list of Order objects.
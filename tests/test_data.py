@@ -0,0 +1,221 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from core.data import API_CACHE_ADJUSTED_TTL, BAR_COLUMNS, DataHandler, _pivot_bars
+
+def make_bars(rows):
+    """Long-format bars from (symbol, date, open, high, low, close, volume) tuples."""
+    df = pd.DataFrame(rows, columns=['symbol', 'date', 'open', 'high', 'low', 'close', 'volume'])
+    df['date'] = pd.to_datetime(df['date']).dt.tz_localize('UTC')
+    return df
+
+def make_clean_bars(seed=0):
+    """Clean bars on business days for three symbols; C lists late and misses a few days."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2023-01-02', '2023-06-30', tz='UTC')
+    frames = []
+    for symbol in ['A', 'B', 'C']:
+        close = 100 * np.cumprod(1 + rng.normal(0, 0.01, len(dates)))
+        frames.append(pd.DataFrame({
+            'date': dates, 'symbol': symbol, 'open': close * 0.999, 'high': close * 1.01,
+            'low': close * 0.99, 'close': close, 'adj_close': close * 0.98, 'volume': 1000
+        }))
+    bars = pd.concat(frames, ignore_index=True)[BAR_COLUMNS]
+    late = (bars['symbol'] == 'C') & ((bars['date'] < '2023-02-15') | bars['date'].dt.day.isin([10, 20]))
+    return bars[~late].reset_index(drop=True)
+
+class TestDataHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.handler = DataHandler(data_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_validate_unsorted_names_bad_symbol(self):
+        """Test 1: Per-row errors on unsorted input name the symbol of the bad row."""
+        # --- Arrange ---
+        df = make_bars([
+            ('B', '2024-01-02', 10.0, 11.0, 9.0, 10.5, 100),
+            ('A', '2024-01-02', 20.0, 21.0, 19.0, 20.5, 100),
+            ('B', '2024-01-03', 10.0, 9.5, 9.0, 10.5, 100), # High below the close
+            ('A', '2024-01-03', 20.0, 21.0, 19.0, 20.5, 100),
+        ])
+
+        # --- Act / Assert ---
+        with self.assertRaisesRegex(ValueError, "High is not the highest price for symbol B"):
+            self.handler._validate_data(df)
+
+        df.loc[2, 'high'] = 11.0
+        df.loc[3, 'volume'] = -1
+        with self.assertRaisesRegex(ValueError, "Volume is negative for symbol A"):
+            self.handler._validate_data(df)
+
+    def test_validate_errors(self):
+        """Test 3: Each quality check rejects its kind of bad bar, sorted or not."""
+        good = [
+            ('A', '2024-01-02', 20.0, 21.0, 19.0, 20.5, 100),
+            ('A', '2024-01-03', 20.0, 21.0, 19.0, 20.5, 100),
+            ('B', '2024-01-02', 10.0, 11.0, 9.0, 10.5, 100),
+            ('B', '2024-01-03', 10.0, 11.0, 9.0, 10.5, 100),
+        ]
+        self.handler._validate_data(make_bars(good))
+        self.handler._validate_data(make_bars(good[::-1][1:] + good[-1:]).iloc[[2, 0, 1, 3]])
+
+        # B's dates go backwards, in sorted and in interleaved row order
+        backwards = make_bars([good[0], good[1], good[3], good[2]])
+        with self.assertRaisesRegex(ValueError, "Dates for symbol B are not monotonic"):
+            self.handler._validate_data(backwards)
+        with self.assertRaisesRegex(ValueError, "Dates for symbol B are not monotonic"):
+            self.handler._validate_data(backwards.iloc[[2, 0, 3, 1]])
+
+        low = make_bars(good)
+        low.loc[1, 'low'] = 20.8
+        with self.assertRaisesRegex(ValueError, "Low is not the lowest price for symbol A"):
+            self.handler._validate_data(low)
+
+        as_text = make_bars(good)
+        as_text['date'] = as_text['date'].astype(str)
+        with self.assertRaisesRegex(ValueError, "Date column is not of datetime type"):
+            self.handler._validate_data(as_text)
+
+    def test_adjust_matches_merge(self):
+        """Test 4: Aligning adjusted bars by key gives the same frame as the left merge it replaced."""
+        # --- Arrange ---
+        raw = make_clean_bars().drop(columns='adj_close').sample(frac=1, random_state=0).reset_index(drop=True)
+        adj = raw.rename(columns={'date': 'timestamp'})[['timestamp', 'symbol', 'open', 'high', 'low', 'close']].copy()
+        adj[['open', 'high', 'low', 'close']] *= 0.5
+        adj.loc[adj.index[:7], 'close'] = np.nan # Missing adjusted values fall back to raw
+        adj = adj.drop(adj.index[10:20]) # Raw rows without an adjusted bar
+        extra = adj.iloc[:3].assign(symbol='Z') # Adjusted bars without a raw row
+        adj = pd.concat([adj, extra], ignore_index=True).sample(frac=1, random_state=1)
+
+        # --- Act ---
+        result = self.handler._adjust_for_corporate_actions(raw.copy(), adj.copy())
+
+        # --- Assert ---
+        expected_adj = adj.rename(columns={'timestamp': 'date', 'close': 'adj_close'})
+        merged = pd.merge(raw, expected_adj, on=['date', 'symbol'], how='left')
+        for column in ['open', 'high', 'low']:
+            merged[column] = merged[f'{column}_y'].fillna(merged[f'{column}_x'])
+        merged['adj_close'] = merged['adj_close'].fillna(merged['close'])
+        expected = merged[BAR_COLUMNS]
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_pivot_matches_pandas(self):
+        """Test 5: _pivot_bars reshapes unsorted bars with gaps exactly like DataFrame.pivot."""
+        bars = make_clean_bars().sample(frac=1, random_state=0)
+        for field in ['adj_close', 'volume']:
+            expected = bars.pivot(index='date', columns='symbol', values=field).astype(np.float64)
+            pd.testing.assert_frame_equal(_pivot_bars(bars, field), expected, check_freq=False)
+
+    def test_primed_matches_parquet(self):
+        """Test 6: Requests served from the primed matrices equal the same requests read from parquet."""
+        # --- Arrange ---
+        self.handler._save_clean_data(make_clean_bars())
+        requests = [
+            (['A', 'B', 'C'], '2023-01-02', '2023-06-30'),
+            (['C', 'A'], '2023-02-01', '2023-03-31'),
+            (['C'], '2023-01-02', '2023-02-10'), # Before C's first bar
+            (['B'], '2023-04-01', '2023-04-02'), # A weekend
+        ]
+
+        def served():
+            out = []
+            for symbols, start, end in requests:
+                lookback = len(pd.bdate_range(start, end)) - 1
+                out.append(self.handler.get_history(symbols, end_date=end, lookback_days=lookback, field='open'))
+                out.append(self.handler.get_matrices(symbols, start, end, fields=['adj_close', 'volume'], dtype=np.float32))
+            out.append([self.handler.get_price(s, d) for s in ['A', 'C'] for d in ['2023-02-14', '2023-03-10', '2023-03-15', '2023-04-01']])
+            return out
+
+        # --- Act ---
+        from_parquet = served()
+        self.handler.prime(['A', 'B', 'C'], start='2023-01-01', end='2023-06-30')
+        with mock.patch.object(self.handler, '_get_bars_cached', side_effect=AssertionError("read from parquet")):
+            from_primed = served()
+
+        # --- Assert ---
+        for parquet, primed in zip(from_parquet, from_primed):
+            if isinstance(parquet, pd.DataFrame):
+                pd.testing.assert_frame_equal(primed, parquet, check_freq=False)
+            elif isinstance(parquet, tuple) and len(parquet[0]) == 0:
+                self.assertEqual(len(primed[0]), 0)
+            elif isinstance(parquet, tuple):
+                pd.testing.assert_index_equal(primed[0], parquet[0])
+                pd.testing.assert_index_equal(primed[1], parquet[1])
+                for field in parquet[2]:
+                    np.testing.assert_array_equal(primed[2][field], parquet[2][field])
+                    self.assertEqual(primed[2][field].dtype, np.float32)
+            else:
+                self.assertEqual(primed, parquet)
+        self.assertIsNone(from_primed[-1][4]) # C has no bar on its missing day
+
+    def test_ipc_cache_pruned_least_recent_first(self):
+        """Test 2: The Feather cache is pruned back to its size cap, oldest files first."""
+        # --- Arrange ---
+        paths = [self.handler.ipc_cache_dir / f"{name}.feather" for name in ('old', 'mid', 'new')]
+        for k, path in enumerate(paths):
+            path.write_bytes(b'x' * 100)
+            os.utime(path, (1000 + k, 1000 + k))
+
+        # --- Act ---
+        with mock.patch('core.data.IPC_CACHE_MAX_BYTES', 250):
+            self.handler._prune_ipc_cache()
+
+        # --- Assert ---
+        self.assertEqual([path.exists() for path in paths], [False, True, True])
+
+    def test_empty_ingest_into_empty_dir(self):
+        """Test 7: An ingest the API returns no bars for, into an empty data dir, marks the window covered."""
+        # --- Arrange ---
+        fetch = mock.patch.object(self.handler, '_fetch_bars', return_value=pd.DataFrame())
+
+        # --- Act ---
+        with fetch as fetched:
+            self.handler.run_ingestion(['A'], start='2020-01-01', end='2020-12-31')
+            self.handler.run_ingestion(['A'], start='2020-01-01', end='2020-12-31')
+
+        # --- Assert ---
+        self.assertEqual(fetched.call_count, 2) # Raw and adjusted, from the first run only
+        first, last = self.handler._coverage()['A']
+        self.assertLessEqual(first, pd.Timestamp('2020-01-01', tz='UTC'))
+        self.assertGreaterEqual(last, pd.Timestamp('2020-12-31', tz='UTC'))
+
+    def test_api_cache_expires_adjusted_responses(self):
+        """Test 8: Closed raw responses are reused indefinitely, adjusted ones only until they expire, within a size cap."""
+        # --- Arrange ---
+        response = pd.DataFrame(
+            {'open': [1.0], 'high': [1.0], 'low': [1.0], 'close': [1.0], 'volume': [100.0]},
+            index=pd.MultiIndex.from_tuples([('A', pd.Timestamp('2020-01-02', tz='UTC'))], names=['symbol', 'timestamp'])
+        )
+        client = mock.Mock()
+        client.get_stock_bars.return_value.df = response
+        self.handler.alpaca_client = client
+
+        def fetch_all():
+            for adjustment in ['raw', 'all']:
+                self.handler._fetch_bars(['A'], '2020-01-01', '2020-12-31', adjustment)
+
+        # --- Act / Assert ---
+        fetch_all()
+        fetch_all()
+        self.assertEqual(client.get_stock_bars.call_count, 2) # Both served from the cache
+
+        stale = time.time() - 2 * API_CACHE_ADJUSTED_TTL.total_seconds()
+        for path in self.handler.api_cache_dir.glob('*.parquet'):
+            os.utime(path, (stale, stale))
+        fetch_all()
+        self.assertEqual(client.get_stock_bars.call_count, 3) # Only the adjusted request went out again
+
+        with mock.patch('core.data.API_CACHE_MAX_BYTES', 0):
+            self.handler._fetch_bars(['A'], '2019-01-01', '2019-12-31', 'raw')
+        self.assertEqual(list(self.handler.api_cache_dir.glob('*.parquet')), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,98 +1,125 @@
 import unittest
-from unittest.mock import MagicMock
-from datetime import datetime, date
-from backtest.execution import Order, ExecutionHandler, NextOpenFillModel, BasicCostModel
-from backtest.portfolio import Fill
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from core.execution import Order, OrderBatch, ExecutionHandler, NextOpenFillModel, BasicCostModel
 
 class TestExecution(unittest.TestCase):
 
     def setUp(self):
-        """Set up mock objects for each test."""
-        self.mock_data_handler = MagicMock()
+        """Set up shared objects for each test."""
         self.fill_model = NextOpenFillModel()
+        self.open_prices = pd.Series({'AAPL': 100.0, 'MSFT': np.nan})
+
+    def make_order(self, symbol='AAPL', shares=10):
+        return Order(
+            symbol=symbol,
+            shares=shares,
+            generated_dt=datetime(2025, 12, 21),
+            execute_dt=datetime(2025, 12, 22),
+        )
 
     def test_price_selection(self):
         """Test 1: Correct fill price selection."""
         # --- Arrange ---
-        # Mock the data handler to return a specific price
-        self.mock_data_handler.get_price.return_value = 100.0
-        
         cost_model = BasicCostModel() # No costs for this test
         execution_handler = ExecutionHandler(self.fill_model, cost_model)
-        
-        order = Order(
-            symbol='AAPL',
-            shares=10,
-            generated_dt=datetime(2025, 12, 21),
-            execute_dt=datetime(2025, 12, 22),
-        )
+        order = self.make_order()
 
         # --- Act ---
-        fills, rejected = execution_handler.simulate_execution([order], self.mock_data_handler)
+        fills, rejected = execution_handler.simulate_execution([order], self.open_prices)
 
         # --- Assert ---
-        # Ensure get_price was called correctly
-        self.mock_data_handler.get_price.assert_called_once_with(
-            'AAPL', '2025-12-22', field='open'
-        )
-        
-        # Check the returned fill
         self.assertEqual(len(fills), 1)
         self.assertEqual(len(rejected), 0)
         self.assertEqual(fills[0].price, 100.0)
         self.assertEqual(fills[0].shares, 10)
+        self.assertEqual(fills[0].dt, order.execute_dt)
 
     def test_costs(self):
         """Test 2: Correct fee calculation."""
         # --- Arrange ---
-        self.mock_data_handler.get_price.return_value = 100.0
-        
         # 10 bps for slippage, 1 bp for commission
         cost_model = BasicCostModel(commission_bps=1, slippage_bps=10)
         execution_handler = ExecutionHandler(self.fill_model, cost_model)
-        
-        order = Order(
-            symbol='AAPL',
-            shares=10,
-            generated_dt=datetime(2025, 12, 21),
-            execute_dt=datetime(2025, 12, 22),
-        )
-        
+
         # --- Act ---
-        fills, rejected = execution_handler.simulate_execution([order], self.mock_data_handler)
-        
+        fills, rejected = execution_handler.simulate_execution(
+            [self.make_order(), self.make_order(shares=-5)], self.open_prices
+        )
+
         # --- Assert ---
         # notional = 10 * 100 = 1000
         # commission = 0.0001 * 1000 = 0.1
         # slippage = 0.001 * 1000 = 1.0
         # total_fee = 1.1
-        self.assertEqual(len(fills), 1)
+        self.assertEqual(len(fills), 2)
         self.assertAlmostEqual(fills[0].fee, 1.1)
-        
+        self.assertAlmostEqual(fills[1].fee, 0.55)
+
     def test_missing_price_rejection(self):
         """Test 3: Order rejection when price is not available."""
         # --- Arrange ---
-        # Mock the data handler to simulate a missing price
-        self.mock_data_handler.get_price.return_value = None
-        
         cost_model = BasicCostModel()
         execution_handler = ExecutionHandler(self.fill_model, cost_model)
-        
-        order = Order(
-            symbol='AAPL',
-            shares=10,
-            generated_dt=datetime(2025, 12, 21),
-            execute_dt=datetime(2025, 12, 22),
+        missing = self.make_order(symbol='GOOG')
+        nan_price = self.make_order(symbol='MSFT')
+
+        # --- Act ---
+        fills, rejected = execution_handler.simulate_execution(
+            [missing, self.make_order(), nan_price], self.open_prices
         )
 
+        # --- Assert ---
+        self.assertEqual([fill.symbol for fill in fills], ['AAPL'])
+        self.assertEqual(len(rejected), 2)
+        self.assertEqual(rejected[0]['order'], missing)
+        self.assertEqual(rejected[1]['order'], nan_price)
+        self.assertIn('Missing or invalid price', rejected[0]['reason'])
+
+    def test_order_batch(self):
+        """Test 4: Batched orders fill like the equivalent list of orders."""
+        # --- Arrange ---
+        cost_model = BasicCostModel(commission_bps=1)
+        execution_handler = ExecutionHandler(self.fill_model, cost_model)
+        orders = [self.make_order(), self.make_order(symbol='MSFT')]
+        batch = OrderBatch.from_orders(orders)
+
         # --- Act ---
-        fills, rejected = execution_handler.simulate_execution([order], self.mock_data_handler)
-        
+        fills, rejected = execution_handler.simulate_execution(batch, self.open_prices)
+
         # --- Assert ---
-        self.assertEqual(len(fills), 0)
+        self.assertEqual(len(batch), 2)
+        self.assertEqual([(f.symbol, f.shares, f.price, f.fee) for f in fills], [('AAPL', 10.0, 100.0, 0.1)])
+        self.assertEqual(rejected[0]['order'], orders[1])
+
+        # Priced from a matrix row through the batch's column indices (-1 marks an unknown symbol)
+        batch.cols = np.array([1, -1])
+        fills, rejected = execution_handler.simulate_execution(batch, np.array([50.0, 100.0], dtype=np.float32))
+        self.assertEqual([(f.symbol, f.price) for f in fills], [('AAPL', 100.0)])
+        self.assertEqual(len(rejected), 1)
+
+        mixed = [self.make_order(), Order('AAPL', 1, datetime(2025, 12, 21), datetime(2025, 12, 23))]
+        with self.assertRaises(ValueError):
+            OrderBatch.from_orders(mixed)
+
+    def test_overridden_fee(self):
+        """Test 5: A cost model overriding calculate_fee is used for the batch's fees."""
+        # --- Arrange ---
+        class FlatFeeModel(BasicCostModel):
+            def calculate_fee(self, shares, price):
+                return np.full(len(shares), 2.5)
+
+        execution_handler = ExecutionHandler(self.fill_model, FlatFeeModel(commission_bps=1))
+
+        # --- Act ---
+        fills, rejected = execution_handler.simulate_execution(
+            [self.make_order(), self.make_order(symbol='MSFT')], self.open_prices
+        )
+
+        # --- Assert ---
+        self.assertEqual([(f.symbol, f.fee) for f in fills], [('AAPL', 2.5)])
         self.assertEqual(len(rejected), 1)
-        self.assertEqual(rejected[0]['order'], order)
-        self.assertIn('Missing or invalid price', rejected[0]['reason'])
 
 if __name__ == '__main__':
     unittest.main()
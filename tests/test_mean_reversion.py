@@ -0,0 +1,67 @@
+import unittest
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from strategies.mean_reversion import MeanReversionStrategy
+
+class TestMeanReversion(unittest.TestCase):
+
+    def make_state(self, n, equity=10000.0):
+        return {
+            'equity': equity,
+            'cash': equity,
+            'positions_vec': np.zeros(n),
+            'weights_vec': np.zeros(n),
+        }
+
+    def test_short_lookback_longer_than_vol(self):
+        """Test 1: A short lookback beyond the volatility lookback sizes the window from it."""
+        # --- Arrange ---
+        strategy = MeanReversionStrategy(universe=['A', 'B'], lookback_short=30, lookback_vol=10)
+        strategy.columns = pd.Index(['A', 'B'])
+        rng = np.random.default_rng(0)
+        window = (100 * np.cumprod(1 + rng.normal(0, 0.01, (strategy.required_lookback, 2)), axis=0)).astype(np.float32)
+        window[-1, 0] = window[0, 0] * 0.7 # A falls sharply over the short lookback
+
+        # --- Act ---
+        quantities = strategy.generate_orders(datetime(2024, 1, 2), window, self.make_state(2))
+
+        # --- Assert ---
+        self.assertEqual(strategy.required_lookback, 31)
+        returns = window[1:].astype(np.float64) / window[:-1] - 1
+        vol = returns[-10:].std(axis=0, ddof=1)
+        z = (window[-1] / window[-30].astype(np.float64) - 1) / vol
+        expected = {s: round(0.5 * 10000.0 / float(window[-1, j])) for j, s in enumerate(['A', 'B']) if z[j] < -1.5}
+        self.assertIn('A', quantities)
+        self.assertEqual(quantities, expected)
+
+    def test_incremental_vol_matches_full_recompute(self):
+        """Test 3: Volatility rolled forward bar by bar matches a full recompute, across re-seeds."""
+        # --- Arrange ---
+        strategy = MeanReversionStrategy(universe=['A', 'B', 'C'], lookback_vol=20)
+        strategy.columns = pd.Index(['A', 'B', 'C'])
+        rng = np.random.default_rng(1)
+        prices = (100 * np.cumprod(1 + rng.normal(0, 0.02, (600, 3)), axis=0)).astype(np.float32)
+        prices[300:310, 1] = np.nan # A gap in B's bars
+        lookback = strategy.required_lookback
+
+        # --- Act / Assert ---
+        for bar in range(lookback, len(prices)):
+            window = prices[bar - lookback:bar + 1]
+            strategy.generate_orders(datetime(2024, 1, 2), window, self.make_state(3), bar=bar)
+
+            returns = window[1:] / window[:-1] - 1
+            expected = returns[-20:].astype(np.float64).std(axis=0, ddof=1)
+            np.testing.assert_allclose(strategy._vol, expected, rtol=1e-6, atol=1e-12)
+        # Far enough for the sums to have been re-seeded after _RESEED_EVERY pushes
+        self.assertGreater(len(prices) - lookback, strategy._RESEED_EVERY + 1)
+
+    def test_invalid_lookbacks(self):
+        """Test 2: Lookbacks the signal cannot be computed over are rejected."""
+        with self.assertRaises(ValueError):
+            MeanReversionStrategy(universe=['A'], lookback_short=0)
+        with self.assertRaises(ValueError):
+            MeanReversionStrategy(universe=['A'], lookback_vol=1)
+
+if __name__ == '__main__':
+    unittest.main()
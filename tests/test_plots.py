@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+import pandas as pd
+import reporting.plots as plots
+
+class TestPlots(unittest.TestCase):
+
+    def make_returns(self, n=600):
+        rng = np.random.default_rng(0)
+        returns = pd.Series(rng.normal(0.0005, 0.01, n), index=pd.bdate_range('2020-01-01', periods=n, tz='UTC'))
+        returns.iloc[:30] = 0.0 # Flat before the first trade
+        return returns
+
+    def assert_rolling_matches(self, returns, window):
+        fig = plots.plot_rolling_sharpe_vol(pd.DataFrame({'equity': 1.0}, index=returns.index), window=window, returns=returns)
+        vol = returns.rolling(window).std() * (252**0.5)
+        sharpe = returns.rolling(window).mean() * 252 / vol
+        np.testing.assert_allclose(np.asarray(fig.data[0].y, dtype=float), vol.to_numpy(), rtol=1e-8, atol=1e-10)
+        finite = np.isfinite(sharpe.to_numpy())
+        np.testing.assert_allclose(np.asarray(fig.data[1].y, dtype=float)[finite], sharpe.to_numpy()[finite], rtol=1e-6)
+        self.assertEqual(np.isfinite(np.asarray(fig.data[0].y, dtype=float)).sum(), np.isfinite(vol.to_numpy()).sum())
+
+    def test_rolling_matches_pandas(self):
+        """Test 1: Rolling volatility and Sharpe match Series.rolling, with and without missing returns."""
+        # --- Arrange ---
+        returns = self.make_returns()
+        gapped = returns.copy()
+        gapped.iloc[[100, 101, 400]] = np.nan
+
+        # --- Act / Assert ---
+        for window in [2, 63, 252, len(returns), len(returns) + 1]:
+            self.assert_rolling_matches(returns, window)
+        for window in [2, 63, 252]:
+            self.assert_rolling_matches(gapped, window)
+
+    def test_lttb_keeps_ends_and_extremes(self):
+        """Test 2: LTTB keeps the end points and an isolated spike, and leaves short series alone."""
+        # --- Arrange ---
+        y = np.sin(np.linspace(0, 20, 50_000))
+        y[12_345] = 5.0
+        series = pd.Series(y, index=pd.date_range('2000-01-01', periods=len(y), tz='UTC'))
+
+        # --- Act ---
+        keep = plots._lttb_indices(y, 1000)
+        downsampled = plots._downsample(series)
+
+        # --- Assert ---
+        self.assertEqual(len(keep), 1000)
+        self.assertEqual((keep[0], keep[-1]), (0, len(y) - 1))
+        self.assertTrue((np.diff(keep) > 0).all())
+        self.assertIn(12_345, keep)
+        np.testing.assert_array_equal(plots._lttb_indices(y[:500], 1000), np.arange(500))
+        self.assertEqual(len(downsampled), plots.MAX_POINTS)
+        self.assertEqual(downsampled.max(), 5.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from datetime import datetime
-from backtest.portfolio import Portfolio, Fill
+import numpy as np
+from core.portfolio import Portfolio, Fill
 
 class TestPortfolio(unittest.TestCase):
 
@@ -25,12 +26,12 @@ class TestPortfolio(unittest.TestCase):
         self.assertAlmostEqual(portfolio.fees_paid, 1.0)
         
         # Mark to market at the buy price
-        equity = portfolio.mark_to_market(prices={'AAPL': 10.0})
+        equity = portfolio.mark_to_market(np.array([10.0]))
         # Equity should be cash + position_value = 899 + (10 * 10) = 999
         self.assertAlmostEqual(equity, 999.0)
         
         # Mark to market at a different price
-        equity_new_price = portfolio.mark_to_market(prices={'AAPL': 12.0})
+        equity_new_price = portfolio.mark_to_market(np.array([12.0]))
         # Equity should be cash + position_value = 899 + (10 * 12) = 1019
         self.assertAlmostEqual(equity_new_price, 1019.0)
 
@@ -58,7 +59,7 @@ class TestPortfolio(unittest.TestCase):
         self.assertAlmostEqual(portfolio.fees_paid, 2.0)
         
         # Mark to market
-        equity = portfolio.mark_to_market(prices={'AAPL': 12.0})
+        equity = portfolio.mark_to_market(np.array([12.0]))
         # Equity = cash + position_value = 958 + (5 * 12) = 1018
         self.assertAlmostEqual(equity, 1018.0)
 
@@ -89,7 +90,7 @@ class TestPortfolio(unittest.TestCase):
         self.assertAlmostEqual(portfolio.fees_paid, 2.0)
         
         # Equity should equal final cash since there are no positions
-        equity = portfolio.mark_to_market(prices={})
+        equity = portfolio.mark_to_market(np.empty(0))
         self.assertAlmostEqual(equity, 1018.0)
 
 if __name__ == '__main__':
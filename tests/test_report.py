@@ -0,0 +1,60 @@
+import pathlib
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from reporting.compute_report import BacktestReport
+import reporting.plots as plots
+
+class TestReport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        dates = pd.bdate_range('2023-01-02', periods=300, tz='UTC')
+        equity = 100000 * np.cumprod(1 + rng.normal(0, 0.01, len(dates)))
+        equity[150:200] *= np.linspace(1.0, 0.7, 50) # A drawdown after the gap
+        self.equity = pd.Series(equity, index=dates)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_report(self, equity: pd.Series) -> BacktestReport:
+        return BacktestReport(pd.DataFrame({'equity': equity}), pd.DataFrame(), report_dir=pathlib.Path(self.tmp.name))
+
+    def test_metrics_with_missing_equity(self):
+        """Test 1: A day without an equity mark counts as a flat return and leaves the metrics finite."""
+        # --- Arrange ---
+        gapped = self.equity.copy()
+        gapped.iloc[100] = np.nan
+
+        # --- Act ---
+        report = self.make_report(gapped)
+
+        # --- Assert ---
+        expected = gapped.pct_change().fillna(0)
+        np.testing.assert_allclose(report.returns.to_numpy(), expected.to_numpy(), rtol=1e-12, atol=1e-15)
+        vol = expected.std() * np.sqrt(252)
+        self.assertEqual(report.metrics['Annualized Volatility'], f"{vol:.2%}")
+        self.assertNotIn('nan', ''.join(report.metrics.values()))
+
+    def test_drawdown_with_missing_equity(self):
+        """Test 2: The drawdown keeps tracking the peak past a day without an equity mark."""
+        # --- Arrange ---
+        gapped = self.equity.copy()
+        gapped.iloc[100] = np.nan
+
+        # --- Act ---
+        report = self.make_report(gapped)
+        fig = plots.plot_drawdown_curve(report.daily_snapshots)
+
+        # --- Assert ---
+        filled = gapped.ffill()
+        expected = filled / filled.cummax() - 1
+        expected.iloc[100] = np.nan
+        pd.testing.assert_series_equal(report._drawdown, expected, check_names=False)
+        self.assertEqual(report.metrics['Max Drawdown'], f"{expected.min():.2%}")
+        np.testing.assert_allclose(np.asarray(fig.data[0].y, dtype=float), expected.to_numpy())
+
+if __name__ == '__main__':
+    unittest.main()
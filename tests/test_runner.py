@@ -0,0 +1,70 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import core.runner as runner
+from core.data import BAR_COLUMNS
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        """Runs from a temporary directory holding synthetic bars that cover every ingest window."""
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.handler_patch = mock.patch.object(runner, '_data_handler', None)
+        self.handler_patch.start()
+
+        dates = pd.bdate_range('2019-01-01', '2020-12-31', tz='UTC', name='date')
+        rng = np.random.default_rng(0)
+        frames = []
+        for symbol in ['A', 'B', 'SPY']:
+            close = 100 * np.cumprod(1 + rng.normal(0, 0.02, len(dates)))
+            frames.append(pd.DataFrame({
+                'date': dates, 'symbol': symbol, 'open': close * 0.999, 'high': close * 1.01,
+                'low': close * 0.99, 'close': close, 'adj_close': close, 'volume': 1000
+            }))
+        handler = runner.get_data_handler()
+        handler._save_clean_data(pd.concat(frames, ignore_index=True)[BAR_COLUMNS])
+        handler._dump_manifest({
+            symbol: [pd.Timestamp('2019-01-01', tz='UTC').isoformat(), dates[-1].isoformat()]
+            for symbol in ['A', 'B', 'SPY']
+        })
+        self.config = {
+            'start_date': '2020-06-01', 'end_date': '2020-12-31', 'initial_cash': 100000.0,
+            'universe': ['A', 'B'], 'benchmark': 'SPY', 'strategy': 'mean_reversion',
+            'lookback_short': 5, 'lookback_vol': 20, 'entry_z': 1.0, 'exit_z': 0.5
+        }
+
+    def tearDown(self):
+        self.handler_patch.stop()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_corrupt_entry_is_recomputed(self):
+        """Test 1: A truncated cache file is treated as a miss and replaced by the recomputed result."""
+        # --- Arrange ---
+        expected = runner.run_backtest(self.config)
+        cache_path = runner.RESULT_CACHE_DIR / f"{runner._result_key(self.config)}.pkl"
+        cache_path.write_bytes(cache_path.read_bytes()[:100])
+
+        # --- Act ---
+        result = runner.run_backtest(self.config)
+
+        # --- Assert ---
+        pd.testing.assert_frame_equal(result.daily_snapshots, expected.daily_snapshots)
+        with cache_path.open('rb') as f:
+            pd.testing.assert_frame_equal(pickle.load(f).daily_snapshots, expected.daily_snapshots)
+
+    def test_key_changes_with_code(self):
+        """Test 2: Changing the backtesting source changes every result key, so older results are not reused."""
+        key = runner._result_key(self.config)
+        with mock.patch.object(runner, '_code_key', return_value=b'other'):
+            self.assertNotEqual(runner._result_key(self.config), key)
+        self.assertEqual(runner._result_key(self.config), key)
+
+if __name__ == '__main__':
+    unittest.main()
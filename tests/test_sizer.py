@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import pandas as pd
+from core.sizer import target_weights_to_quantities
+
+def dense_quantities(target_weights, current_positions, equity, close_prices):
+    """The dense sizing the sparse sizer replaced: every target and every holding, held-only symbols to zero."""
+    quantities = {}
+    for symbol in list(target_weights) + [s for s in current_positions if s not in target_weights]:
+        price = close_prices.get(symbol, np.nan)
+        if not (np.isfinite(price) and price > 0):
+            continue
+        qty = round(target_weights.get(symbol, 0.0) * equity / price - current_positions.get(symbol, 0.0))
+        if abs(qty) >= 1:
+            quantities[symbol] = float(qty)
+    return quantities
+
+class TestSizer(unittest.TestCase):
+
+    def setUp(self):
+        self.prices = pd.Series({'A': 50.0, 'B': 20.0, 'C': 10.0, 'D': 25.0, 'E': 40.0, 'F': np.nan})
+        self.positions = {'A': 40.0, 'B': 100.0, 'C': 3.0}
+        self.equity = 10000.0
+
+    def test_sparse_matches_dense(self):
+        """Test 1: Sizing only the changed targets gives the dense sizer's orders."""
+        # --- Arrange ---
+        # A holds at its current weight, B is liquidated, D and F enter, E stays flat
+        dense_targets = {'A': 0.2, 'B': 0.0, 'C': 0.003, 'D': 0.25, 'E': 0.0, 'F': 0.25}
+        sparse_targets = {'B': 0.0, 'D': 0.25, 'F': 0.25}
+
+        # --- Act ---
+        sparse = target_weights_to_quantities(sparse_targets, self.positions, self.equity, self.prices)
+
+        # --- Assert ---
+        self.assertEqual(sparse, {'B': -100.0, 'D': 100.0})
+        self.assertEqual(sparse, dense_quantities(dense_targets, self.positions, self.equity, self.prices))
+        self.assertEqual(
+            target_weights_to_quantities(dense_targets, self.positions, self.equity, self.prices),
+            dense_quantities(dense_targets, self.positions, self.equity, self.prices)
+        )
+
+    def test_omitted_holding_is_kept(self):
+        """Test 2: A holding left out of the targets is not sized, while an explicit 0.0 sells it."""
+        self.assertEqual(target_weights_to_quantities({}, self.positions, self.equity, self.prices), {})
+        self.assertEqual(
+            target_weights_to_quantities({'D': 0.1}, self.positions, self.equity, self.prices),
+            {'D': 40.0}
+        )
+        self.assertEqual(
+            target_weights_to_quantities({'A': 0.0}, self.positions, self.equity, self.prices),
+            {'A': -40.0}
+        )
+
+if __name__ == '__main__':
+    unittest.main()
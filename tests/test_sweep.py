@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import core.runner as runner
+from core.data import BAR_COLUMNS
+from core.sweep import run_sweep
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        """Runs from a temporary directory holding synthetic bars that cover every ingest window."""
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.handler_patch = mock.patch.object(runner, '_data_handler', None)
+        self.handler_patch.start()
+
+        dates = pd.bdate_range('2019-01-01', '2020-12-31', tz='UTC', name='date')
+        rng = np.random.default_rng(0)
+        frames = []
+        for symbol in ['A', 'B', 'C', 'SPY']:
+            close = 100 * np.cumprod(1 + rng.normal(0, 0.02, len(dates)))
+            frames.append(pd.DataFrame({
+                'date': dates, 'symbol': symbol, 'open': close * 0.999, 'high': close * 1.01,
+                'low': close * 0.99, 'close': close, 'adj_close': close, 'volume': 1000
+            }))
+        handler = runner.get_data_handler()
+        handler._save_clean_data(pd.concat(frames, ignore_index=True)[BAR_COLUMNS])
+        handler._dump_manifest({
+            symbol: [pd.Timestamp('2019-01-01', tz='UTC').isoformat(), dates[-1].isoformat()]
+            for symbol in ['A', 'B', 'C', 'SPY']
+        })
+
+    def tearDown(self):
+        self.handler_patch.stop()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_sweep_matches_single_runs(self):
+        """Test 1: Each grid point's result equals a plain run_backtest with the same parameters."""
+        # --- Arrange ---
+        base_config = {
+            'start_date': '2020-01-01', 'end_date': '2020-12-31', 'initial_cash': 100000.0,
+            'universe': ['A', 'B', 'C'], 'benchmark': 'SPY', 'strategy': 'mean_reversion',
+            'lookback_short': 5, 'lookback_vol': 20, 'exit_z': 0.5
+        }
+
+        # --- Act ---
+        results = run_sweep(base_config, {'entry_z': [1.0, 1.5]}, n_jobs=2)
+
+        # --- Assert ---
+        self.assertEqual([config['entry_z'] for config, _ in results], [1.0, 1.5])
+        shutil.rmtree(runner.RESULT_CACHE_DIR) # So the plain runs are computed, not loaded
+        for config, result in results:
+            expected = runner.run_backtest(config)
+            pd.testing.assert_frame_equal(result.daily_snapshots, expected.daily_snapshots)
+            pd.testing.assert_frame_equal(result.fills, expected.fills)
+            self.assertEqual(result.metrics, expected.metrics)
+        self.assertNotEqual(len(results[0][1].fills), len(results[1][1].fills))
+
+        with self.assertRaises(ValueError):
+            run_sweep(base_config, {'lookback': [1]})
+
+if __name__ == '__main__':
+    unittest.main()